@@ -24,7 +24,7 @@ class SynchroniseWooCommerce:
 	@staticmethod
 	def get_wc_servers():
 		wc_servers = frappe.get_all("WooCommerce Server")
-		return [frappe.get_doc("WooCommerce Server", server.name) for server in wc_servers]
+		return [frappe.get_cached_doc("WooCommerce Server", server.name) for server in wc_servers]
 
 
 def log_and_raise_error(err):
@@ -1,30 +1,121 @@
+import hashlib
 import json
+import random
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 from typing import List, Optional, Tuple
 import re  
 
 import frappe
+import unidecode
+from bs4 import BeautifulSoup
 from erpnext.stock.doctype.item.item import Item
 from frappe import ValidationError, _, _dict
-from frappe.query_builder import Criterion
-from frappe.utils import get_datetime, now
+from frappe.query_builder import Criterion, Order
+from frappe.query_builder.functions import Count
+from frappe.utils import cint, get_datetime, getdate, now, nowtime
 from jsonpath_ng.ext import parse
 
 from woocommerce_fusion.exceptions import SyncDisabledError
 from woocommerce_fusion.tasks.sync import SynchroniseWooCommerce
+from woocommerce_fusion.tasks.utils import new_pooled_session
 from woocommerce_fusion.woocommerce.doctype.woocommerce_product.woocommerce_product import (
     WooCommerceProduct,
 )
 from woocommerce_fusion.woocommerce.doctype.woocommerce_server.woocommerce_server import (
     WooCommerceServer,
 )
-from woocommerce_fusion.woocommerce.woocommerce_api import (
-    generate_woocommerce_record_name_from_domain_and_id,
-)
 from woocommerce import API
 from frappe.utils import nowdate
+import requests
+
+_SLUG_RE = re.compile(r"[^a-zA-Z0-9]+")
+_STRAY_N_LINE_RE = re.compile(r"^\s*n\s*$", flags=re.MULTILINE)
+_YEAR_SEPARATOR_RE = re.compile(r"[,\s]+")
+_ARABIC_RE = re.compile(r"[\u0600-\u06FF]")
+_ENG_RUN_RE = re.compile(r"[A-Za-z0-9\-\/\(\)\[\]\'\"\.\,\&\+\s]+")
+_ENG_PUNCT_ONLY_RE = re.compile(r"[-\/\(\)\[\]\'\"\.\,\&\+\s]*")
+
+# WooCommerce category ids resolved in this worker, keyed by (server url, taxonomy, name, parent id),
+# with the time they were resolved. Entries expire so categories deleted on WooCommerce are looked up again
+_WC_CATEGORY_IDS = {}
+_WC_CATEGORY_ID_TTL = 600
+
+# Synced WooCommerce ids used for the random "Bought Together" fallback, per site since a worker
+# can serve several sites
+_WC_ID_POOLS = {}
+_WC_ID_POOL_TTL = 600
+
+# Set to True to write sync breadcrumbs to the "wc_sync" log file
+WC_SYNC_VERBOSE = False
+
+# Shared keep-alive session for direct WooCommerce REST calls
+_WC_SESSION = new_pooled_session()
+
 
+def put_wc_product(url: str, auth: tuple, payload: dict) -> dict:
+    """
+    PUT a product payload to WooCommerce. Touches neither the database nor the Error Log,
+    so it can run outside a site connection
+    """
+    try:
+        resp = _WC_SESSION.put(url, auth=auth, json=payload, timeout=(15, 120))
+        return {"ok": resp.status_code in (200, 201), "status": resp.status_code}
+    except Exception as e:
+        return {"ok": False, "status": "exception", "error": str(e)}
+
+
+def put_wc_product_or_skip_images(url: str, auth: tuple, payload: dict) -> dict:
+    """
+    PUT a product payload like put_wc_product. When WooCommerce rejects it with HTTP 400 and it
+    carries images, which WooCommerce fails to download more often than it rejects anything else,
+    the payload is sent again without them and the rejected result is kept under "rejected"
+    """
+    result = put_wc_product(url, auth, payload)
+    if result.get("status") != 400 or "images" not in payload or len(payload) == 1:
+        return result
+    retry = put_wc_product(url, auth, {k: v for k, v in payload.items() if k != "images"})
+    retry["rejected"] = result
+    return retry
+
+
+def get_cached_wc_category_id(cache_key: tuple) -> Optional[int]:
+    entry = _WC_CATEGORY_IDS.get(cache_key)
+    if entry and time.time() - entry[1] <= _WC_CATEGORY_ID_TTL:
+        return entry[0]
+    return None
+
+
+def cache_wc_category_id(cache_key: tuple, category_id: int) -> None:
+    now_ts = time.time()
+    # Drop expired entries on the way, so the cache only holds recently used categories
+    for key, entry in list(_WC_CATEGORY_IDS.items()):
+        if now_ts - entry[1] > _WC_CATEGORY_ID_TTL:
+            _WC_CATEGORY_IDS.pop(key, None)
+    _WC_CATEGORY_IDS[cache_key] = (category_id, now_ts)
+
+
+def forget_wc_category_ids(payload: dict) -> None:
+    """
+    Drop the cached category ids sent in a payload that WooCommerce rejected, so they are looked up again
+    """
+    ids = {c.get("id") for c in payload.get("categories") or []}
+    ids.update(payload.get("offer_category") or [])
+    for key, entry in list(_WC_CATEGORY_IDS.items()):
+        if entry[0] in ids:
+            _WC_CATEGORY_IDS.pop(key, None)
+
+
+def log_sync_debug(title: str, message: str = "") -> None:
+    """
+    Write a debug breadcrumb to the "wc_sync" log file instead of creating an Error Log record
+    """
+    if WC_SYNC_VERBOSE:
+        frappe.logger("wc_sync", with_more_info=False).debug("%s | %s", title, message)
 
 
 def run_item_sync_from_hook(doc, method):
@@ -36,11 +127,13 @@ def run_item_sync_from_hook(doc, method):
         and not doc.flags.get("created_by_sync", None)
         and len(doc.woocommerce_servers) > 0
     ):
-        frappe.msgprint(
-            _("Background sync to WooCommerce triggered for {0} {1}").format(frappe.bold(doc.name), method),
-            indicator="blue",
-            alert=True,
-        )
+        # Skip the alert on bulk saves (Data Import, patches), where nobody sees it
+        if not (frappe.flags.in_import or frappe.flags.in_patch):
+            frappe.msgprint(
+                _("Background sync to WooCommerce triggered for {0} {1}").format(frappe.bold(doc.name), method),
+                indicator="blue",
+                alert=True,
+            )
         frappe.enqueue(clear_sync_hash_and_run_item_sync, item_code=doc.name)
 
 
@@ -76,16 +169,13 @@ def run_item_sync(
 
     # Get ERPNext Item and WooCommerce product if they exist
     if woocommerce_product or woocommerce_product_name:
-        # frappe.log_error("64")
         if not woocommerce_product:
-            # frappe.log_error("66")
             woocommerce_product = frappe.get_doc(
                 {"doctype": "WooCommerce Product", "name": woocommerce_product_name}
             )
             woocommerce_product.load_from_db()
 
         # Trigger sync
-        # frappe.log_error("73")
         sync = SynchroniseItem(woocommerce_product=woocommerce_product)
         if enqueue:
             frappe.enqueue(sync.run)
@@ -93,31 +183,18 @@ def run_item_sync(
             sync.run()
 
     elif item or item_code:
-        # frappe.log_error("92")
         if not item:
             item = frappe.get_doc("Item", item_code)
             
         # 🧠 --- VALIDATION BEFORE SYNC ---
         # Check price
-        price_doc = frappe.get_all(
-            "Item Price",
-            filters={"item_code": item.item_code, "price_list": "Standard Selling"},
-            fields=["price_list_rate"],
-            limit=1
-        )
-        price = price_doc[0].price_list_rate if price_doc else 0.0
+        price = get_standard_selling_price(item.item_code)
 
-        if item.custom_disable_sync == 1 or item.custom_disable_sync_if_not_in_stock == 1:
-            frappe.log_error(
-                "❌ Skipped Item Sync","sync disabled"
-            )
-            return (None, None)
-                   
-        if not price or price <= 0:
-            frappe.log_error(
-                "❌ Skipped Item Sync",
-                f"Item {item.item_code} not synced — Price: {price}"
-            )
+        skip_reason = get_item_sync_skip_reason(
+            item.custom_disable_sync, item.custom_disable_sync_if_not_in_stock, price
+        )
+        if skip_reason:
+            log_sync_debug("Skipped Item Sync", f"Item {item.item_code} not synced — {skip_reason}")
             return (None, None)
         
         if not item.woocommerce_servers:
@@ -134,10 +211,32 @@ def run_item_sync(
             }).insert(ignore_permissions=True)
             frappe.db.commit()
             return (None, None)
+
+        # Name, description, attributes, compatibility, price and stock do not depend on the
+        # WooCommerce Server, so compute them once and share them across servers
+        ctx = None
+        if len(item.woocommerce_servers) > 1:
+            ctx = SynchroniseItem().build_item_sync_context(item)
+
+        # Each row is pushed through its own WooCommerce Server, not the first enabled one
+        wc_servers = get_wc_server_api_settings([row.woocommerce_server for row in item.woocommerce_servers])
+
+        if not enqueue and len(item.woocommerce_servers) > 1:
+            # Each server push is network-bound, so run them concurrently
+            syncs = run_item_sync_for_servers_in_parallel(item, ctx=ctx, wc_servers=wc_servers)
+            sync = syncs[-1] if syncs else None
+            return (
+                sync.item.item if sync and sync.item else None,
+                sync.woocommerce_product if sync else None,
+            )
+
         for wc_server in item.woocommerce_servers:
             try:
+                server = wc_servers.get(wc_server.woocommerce_server)
                 sync = SynchroniseItem(
-                    item=ERPNextItemToSync(item=item, item_woocommerce_server_idx=wc_server.idx)
+                    servers=[server] if server else None,
+                    item=ERPNextItemToSync(item=item, item_woocommerce_server_idx=wc_server.idx),
+                    ctx=ctx,
                 )
                 if enqueue:
                     frappe.enqueue(sync.run)
@@ -153,14 +252,89 @@ def run_item_sync(
     )
 
 
+def get_wc_server_api_settings(server_names: List[str]) -> dict:
+    """
+    URL, keys and sync flag of several WooCommerce Servers in one query, keyed by server name
+    """
+    server_names = list({name for name in server_names if name})
+    if not server_names:
+        return {}
+    return {
+        server.name: server
+        for server in frappe.get_all(
+            "WooCommerce Server",
+            filters={"name": ["in", server_names]},
+            fields=["name", "woocommerce_server_url", "api_consumer_key", "api_consumer_secret", "enable_sync"],
+        )
+    }
+
+
+def run_item_sync_for_servers_in_parallel(
+    item: Item, ctx: Optional["ItemSyncContext"] = None, wc_servers: Optional[dict] = None
+) -> List["SynchroniseItem"]:
+    """
+    Synchronise an Item to each of its WooCommerce Servers, sending the product PUTs concurrently.
+
+    Everything that reads or writes the Item (including product creation, which saves it) runs
+    serially on this thread. Only the final PUT of each server goes to the thread pool, and those
+    threads never touch the database. Inside a bulk sync worker thread (see run_bulk_items_in_parallel)
+    the PUTs are sent serially too, so concurrency stays bounded by wc_sync_workers.
+    """
+    if wc_servers is None:
+        wc_servers = get_wc_server_api_settings([row.woocommerce_server for row in item.woocommerce_servers])
+
+    syncs = []
+    error = None
+    for wc_server in item.woocommerce_servers:
+        server = wc_servers.get(wc_server.woocommerce_server)
+        sync = SynchroniseItem(
+            servers=[server] if server else None,
+            item=ERPNextItemToSync(item=item, item_woocommerce_server_idx=wc_server.idx),
+            ctx=ctx,
+        )
+        sync.defer_push = True
+        try:
+            sync.run()
+        except IndexError:
+            frappe.log_error(f"WooCommerce server index out of range for item {item.item_code}", "Sync Skip")
+            continue
+        except Exception as e:
+            # Like the serial loop, stop at the first failing server, but still push the ones already prepared
+            error = e
+            break
+        syncs.append(sync)
+
+    pending = [sync for sync in syncs if sync.deferred_push]
+
+    def send(sync):
+        product_id, digest, payload, field_labels = sync.deferred_push
+        if not field_labels:
+            return None
+        return put_wc_product_or_skip_images(f"{sync.wc_products_url}/{product_id}", sync.wc_auth, payload)
+
+    if len(pending) > 1 and not frappe.flags.in_wc_sync_worker:
+        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+            results = list(executor.map(send, pending))
+    else:
+        results = [send(sync) for sync in pending]
+
+    for sync, result in zip(pending, results):
+        sync.complete_deferred_push(result)
+
+    if error:
+        raise error
+    return syncs
+
+
 def sync_woocommerce_products_modified_since(date_time_from=None):
     """
     Get list of WooCommerce products modified since date_time_from
     """
-    wc_settings = frappe.get_doc("WooCommerce Integration Settings")
-
     if not date_time_from:
-        date_time_from = wc_settings.wc_last_sync_date_items
+        # Read from the database, a cached settings doc can hold a stale sync date
+        date_time_from = frappe.db.get_single_value(
+            "WooCommerce Integration Settings", "wc_last_sync_date_items"
+        )
 
     # Validate
     if not date_time_from:
@@ -174,7 +348,10 @@ def sync_woocommerce_products_modified_since(date_time_from=None):
         raise ValueError(error_text)
 
     wc_products = get_list_of_wc_products(date_time_from=date_time_from)
+    skip = get_wc_products_to_skip(wc_products)
     for wc_product in wc_products:
+        if (wc_product.woocommerce_server, str(wc_product.woocommerce_id)) in skip:
+            continue
         try:
             run_item_sync(woocommerce_product=wc_product, enqueue=True)
         # Skip items with errors, as these exceptions will be logged
@@ -184,6 +361,68 @@ def sync_woocommerce_products_modified_since(date_time_from=None):
     frappe.db.set_single_value("WooCommerce Settings", "wc_last_sync_date_items", now())
 
 
+def get_item_sync_skip_reason(disable_sync, disable_sync_if_not_in_stock, price) -> Optional[str]:
+    """
+    Why an Item is not pushed to WooCommerce (sync disabled or no positive Standard Selling price),
+    or None if it should be
+    """
+    if cint(disable_sync) or cint(disable_sync_if_not_in_stock):
+        return "sync disabled"
+    if not price or price <= 0:
+        return f"Price: {price}"
+    return None
+
+
+def get_wc_products_to_skip(wc_products: List[WooCommerceProduct]) -> set:
+    """
+    Return (woocommerce_server, woocommerce_id) pairs of modified products whose linked Item fails
+    the same rules run_item_sync applies to Items (see get_item_sync_skip_reason).
+
+    Products used to be synced whatever the state of their Item; they now follow the Item rules so a
+    disabled or unpriced Item is not pushed back just because its WooCommerce product changed.
+    Products without a linked Item are never skipped.
+    """
+    woocommerce_ids = list({str(wc_product.woocommerce_id) for wc_product in wc_products})
+    if not woocommerce_ids:
+        return set()
+
+    keep, skip = set(), set()
+    for row in get_linked_item_sync_rows(woocommerce_ids):
+        key = (row.woocommerce_server, str(row.woocommerce_id))
+        if get_item_sync_skip_reason(
+            row.custom_disable_sync, row.custom_disable_sync_if_not_in_stock, row.price_list_rate
+        ):
+            skip.add(key)
+        else:
+            keep.add(key)
+    # An Item with several price rows is kept if any of them is valid
+    return skip - keep
+
+
+def get_linked_item_sync_rows(woocommerce_ids: List[str]) -> List[_dict]:
+    """
+    Sync flags and Standard Selling rates of the Items linked to these WooCommerce ids, in one query
+    """
+    iws = frappe.qb.DocType("Item WooCommerce Server")
+    itm = frappe.qb.DocType("Item")
+    ip = frappe.qb.DocType("Item Price")
+    return (
+        frappe.qb.from_(iws)
+        .join(itm)
+        .on(iws.parent == itm.name)
+        .left_join(ip)
+        .on((ip.item_code == itm.name) & (ip.price_list == "Standard Selling"))
+        .where(iws.woocommerce_id.isin(woocommerce_ids))
+        .select(
+            iws.woocommerce_server,
+            iws.woocommerce_id,
+            itm.custom_disable_sync,
+            itm.custom_disable_sync_if_not_in_stock,
+            ip.price_list_rate,
+        )
+    ).run(as_dict=True)
+
+
 @dataclass
 class ERPNextItemToSync:
     """Class for keeping track of an ERPNext Item and the relevant WooCommerce Server to sync to"""
@@ -195,6 +434,21 @@ class ERPNextItemToSync:
     def item_woocommerce_server(self):
         return self.item.woocommerce_servers[self.item_woocommerce_server_idx - 1]
 
+@dataclass
+class ItemSyncContext:
+    """Server-independent data for an ERPNext Item, computed once and shared by every per-server sync"""
+
+    item_code: str
+    clean_name: str
+    description: str
+    short_description: Optional[str]
+    attributes: List[dict]
+    compat_meta: dict
+    compat_count: int
+    price: float
+    bins: List[_dict]
+
+
 class SynchroniseItem(SynchroniseWooCommerce):
     """
     Class for managing synchronisation of WooCommerce Product with ERPNext Item
@@ -205,18 +459,30 @@ class SynchroniseItem(SynchroniseWooCommerce):
         servers: list = None,
         item: Optional[ERPNextItemToSync] = None,
         woocommerce_product: Optional[WooCommerceProduct] = None,
+        ctx: Optional[ItemSyncContext] = None,
     ) -> None:
         super().__init__(servers)
         self.item = item
         self.woocommerce_product = woocommerce_product
+        self.ctx = ctx
+        # When set, update_woocommerce_product leaves the final PUT in deferred_push for the caller to send
+        self.defer_push = False
+        self.deferred_push = None
+        self._reset_pending_update()
+        self._bundle_cache = {}
+        self._bundle_doc_cache = {}
+        self._translate_cache = {}
+        self._wc_server_cache = {}
+        self._field_map_cache = {}
         self.settings = frappe.get_cached_doc("WooCommerce Integration Settings")
         if not servers:
-            servers = frappe.get_all(
+            server = frappe.db.get_value(
                 "WooCommerce Server",
-                fields=["name","woocommerce_server_url", "api_consumer_key", "api_consumer_secret", "enable_sync"],
-                filters={"enable_sync": 1},
-                limit=1
+                {"enable_sync": 1},
+                ["name","woocommerce_server_url", "api_consumer_key", "api_consumer_secret", "enable_sync"],
+                as_dict=True,
             )
+            servers = [server] if server else []
         if servers and len(servers) > 0:
             server = servers[0] if isinstance(servers[0], dict) else servers[0].as_dict()             
             self.server_name = server.get("name")
@@ -224,8 +490,14 @@ class SynchroniseItem(SynchroniseWooCommerce):
             self.wcapi = API(url=server.get("woocommerce_server_url").rstrip('/'),consumer_key=server.get("api_consumer_key"),consumer_secret=server.get("api_consumer_secret"),version="wc/v3")
             self.consumer_key = server.get("api_consumer_key")
             self.consumer_secret = server.get("api_consumer_secret")
+            self.wc_base_url = (server.get("woocommerce_server_url") or "").rstrip("/")
+            self.wc_products_url = f"{self.wc_base_url}/wp-json/wc/v3/products"
+            self.wc_auth = (self.consumer_key, self.consumer_secret)
+            self.enable_sync = server.get("enable_sync")
         else:
             self.wcapi = None
+            self.wc_base_url = self.wc_products_url = self.wc_auth = None
+            self.enable_sync = 0
 
     def run(self):
         """
@@ -255,9 +527,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
             self.item and not self.woocommerce_product and self.item.item_woocommerce_server.woocommerce_id
         ):
             # Validate that this Item's WooCommerce Server has sync enabled
-            wc_server = frappe.get_cached_doc(
-                "WooCommerce Server", self.item.item_woocommerce_server.woocommerce_server
-            )
+            wc_server = self._wc_server(self.item.item_woocommerce_server.woocommerce_server)
             if not wc_server.enable_sync:
                 raise SyncDisabledError(wc_server)
 
@@ -266,9 +536,9 @@ class SynchroniseItem(SynchroniseWooCommerce):
                 # raise ValueError(
                 # 	f"No WooCommerce Product found with ID {self.item.item_woocommerce_server.woocommerce_id} on {self.item.item_woocommerce_server.woocommerce_server}"
                 # )
-                frappe.log_error(
-                    title="WooCommerce Product Not Found",
-                    message=f"No WooCommerce Product found for ID {self.item.item_woocommerce_server.woocommerce_id} on {self.item.item_woocommerce_server.woocommerce_server}. Recreating..."
+                log_sync_debug(
+                    "WooCommerce Product Not Found",
+                    f"No WooCommerce Product found for ID {self.item.item_woocommerce_server.woocommerce_id} on {self.item.item_woocommerce_server.woocommerce_server}. Recreating..."
                 )
                 self.create_woocommerce_product(self.item)
             else:
@@ -299,24 +569,20 @@ class SynchroniseItem(SynchroniseWooCommerce):
             .join(itm)
             .on(iws.parent == itm.name)
             .where(Criterion.all(and_conditions))
-            .select(iws.parent, iws.name)
+            .select(iws.parent, iws.name, iws.idx)
             .limit(1)
         ).run(as_dict=True)
 
         found_item = frappe.get_doc("Item", item_codes[0].parent) if item_codes else None
         if found_item:
             self.item = ERPNextItemToSync(
-                item=found_item,
-                item_woocommerce_server_idx=next(
-                    server.idx for server in found_item.woocommerce_servers if server.name == item_codes[0].name
-                ),
+                item=found_item, item_woocommerce_server_idx=item_codes[0].idx
             )
 
     def sync_wc_product_with_erpnext_item(self):
         """
         Syncronise Item between ERPNext and WooCommerce
         """
-        # frappe.log_error("255")
         if self.item and not self.woocommerce_product:
             # frappe.log_error("no woo product" )
             # create missing product in WooCommerce
@@ -327,7 +593,6 @@ class SynchroniseItem(SynchroniseWooCommerce):
             self.create_item(self.woocommerce_product)
         elif self.item and self.woocommerce_product:
             # both exist, check sync hash
-            # frappe.log_error("264")
             self.update_woocommerce_product(self.woocommerce_product, self.item)
 
             # if (
@@ -360,7 +625,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
 
         fields_updated, item.item = self.set_item_fields(item=item.item)
 
-        wc_server = frappe.get_cached_doc("WooCommerce Server", woocommerce_product.woocommerce_server)
+        wc_server = self._wc_server(woocommerce_product.woocommerce_server)
         if wc_server.enable_image_sync:
             wc_product_images = json.loads(woocommerce_product.images)
             if len(wc_product_images) > 0:
@@ -375,23 +640,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
         self.set_sync_hash()
 
     def push_wc_product(self, product_id: int, meta=None, **fields) -> dict:
-        import requests
-        # WC_API_URL = "https://demo.mrkbatx.com/wp-json/wc/v3/products"        
-        servers = frappe.get_all(
-            "WooCommerce Server",
-            fields=["woocommerce_server_url", "api_consumer_key", "api_consumer_secret", "enable_sync"],
-            filters={"enable_sync": 1},
-            limit=1
-        )
-        if servers and len(servers) > 0:
-            server = servers[0] if isinstance(servers[0], dict) else servers[0].as_dict()       
-            WC_CONSUMER_KEY = server.get("api_consumer_key")
-            WC_CONSUMER_SECRET = server.get("api_consumer_secret")
-            wc_base_url = server.get("woocommerce_server_url", "").rstrip("/")
-            WC_API_URL = f"{wc_base_url}/wp-json/wc/v3/products"
-            
-        
-        url = f"{WC_API_URL}/{product_id}"
+        url = f"{self.wc_products_url}/{product_id}"
         payload = {}
 
         for k, v in fields.items():
@@ -408,44 +657,111 @@ class SynchroniseItem(SynchroniseWooCommerce):
 
         if not payload:
             frappe.log_error("push_wc_product called with no fields or meta")
-            # frappe.log_error("2")
             return {}
 
-        try:
-            resp = requests.put(
-                url,
-                auth=(WC_CONSUMER_KEY, WC_CONSUMER_SECRET),
-                json=payload,
-                timeout=(15, 120),
-                stream=True,
-            )
-            status = resp.status_code
-            resp.close()
-            if status not in (200, 201):
-                frappe.log_error("Woo API error", f"HTTP {status} for product {product_id}")
-                return {"ok": False, "status": status, "product_id": product_id}
-            return {"ok": True, "status": status, "product_id": product_id}
-        except Exception as e:
-            frappe.log_error(f"Woo API exception: {e}")
-            return {"ok": False, "status": "exception", "error": str(e), "product_id": product_id}
+        return self.record_wc_put_result(put_wc_product(url, self.wc_auth, payload), product_id)
 
-    def _tracked_push(self, product_id, field_label, meta=None, **fields):
-        try:
-            result = self.push_wc_product(product_id, meta=meta, **fields)
-            if not result:
-                result = {"ok": False, "status": "empty", "product_id": product_id}
-        except Exception as e:
-            result = {"ok": False, "status": "exception", "error": str(e), "product_id": product_id}
-        result["field"] = field_label
+    def record_wc_put_result(self, result: dict, product_id: int) -> dict:
+        """
+        Log a failed put_wc_product call and tag its result with the product id
+        """
+        if result.get("status") == "exception":
+            frappe.log_error(f"Woo API exception: {result.get('error')}")
+        elif not result.get("ok"):
+            frappe.log_error("Woo API error", f"HTTP {result.get('status')} for product {product_id}")
+        result["product_id"] = product_id
+        return result
+
+    def _queue_wc_update(self, field_label, meta=None, volatile=False, **fields):
+        """
+        Accumulate fields and meta for the next flush_wc_product call.
+        Plain fields are last-writer-wins, meta dicts are merged by key.
+        Volatile fields change on every run and are left out of the payload fingerprint.
+        """
+        for k, v in fields.items():
+            if v is not None:
+                self._pending_payload[k] = v
+                if volatile:
+                    self._volatile_keys.add(k)
+                else:
+                    self._volatile_keys.discard(k)
+
+        if meta is not None:
+            if isinstance(meta, dict):
+                self._pending_meta.update({k: str(v) for k, v in meta.items()})
+            elif isinstance(meta, list):
+                self._pending_meta.update({m["key"]: m["value"] for m in meta})
+            else:
+                frappe.log_error(f"_queue_wc_update: unsupported meta type {type(meta)}")
+
+        self._pending_fields.append(field_label)
+
+    def _build_pending_payload(self):
+        payload = dict(self._pending_payload)
+        if self._pending_meta:
+            payload["meta_data"] = [{"key": k, "value": v} for k, v in self._pending_meta.items()]
+        return payload
+
+    def pending_payload_fingerprint(self) -> str:
+        """
+        Return a digest of the queued update, used to skip pushing unchanged products
+        """
+        payload = {
+            k: v for k, v in self._build_pending_payload().items() if k not in self._volatile_keys
+        }
+        return hashlib.blake2b(
+            json.dumps(payload, sort_keys=True, default=str).encode(), digest_size=16
+        ).hexdigest()
+
+    def flush_wc_product(self, product_id):
+        """
+        Push all queued fields and meta to WooCommerce in a single PUT request,
+        sent again without the images if WooCommerce rejects it
+        """
+        payload = self._build_pending_payload()
+        field_labels = self._pending_fields
+        self._reset_pending_update()
+
+        if not field_labels:
+            return {}
+
+        if not payload:
+            frappe.log_error("flush_wc_product called with no fields or meta")
+            return self._log_push({"ok": False, "status": "empty", "product_id": product_id}, field_labels)
+
+        result = put_wc_product_or_skip_images(f"{self.wc_products_url}/{product_id}", self.wc_auth, payload)
+        return self.record_wc_push(result, product_id, payload, field_labels)
+
+    def record_wc_push(self, result: dict, product_id: int, payload: dict, field_labels: list) -> dict:
+        """
+        Add the result of a flushed update to the push log. An update only accepted without its
+        images logs the rejected PUT as a failed "images" entry, so total_api_calls counts both
+        requests and failed_fields names the images; the update is then not marked as pushed.
+        """
+        rejected = result.pop("rejected", None)
+        if rejected:
+            self._log_push(self.record_wc_put_result(rejected, product_id), ["images"])
+            field_labels = [label for label in field_labels if label != "images"]
+            result["images_rejected"] = True
+        if result.get("status") == 400:
+            forget_wc_category_ids(payload)
+        return self._log_push(self.record_wc_put_result(result, product_id), field_labels)
+
+    def _log_push(self, result, field_labels):
+        result["field"] = ", ".join(field_labels)
         if not hasattr(self, "_push_log"):
             self._push_log = []
         self._push_log.append(result)
         return result
 
+    def _reset_pending_update(self):
+        self._pending_payload = {}
+        self._pending_meta = {}
+        self._pending_fields = []
+        self._volatile_keys = set()
+
     def log_sync_result(self, item_code, product_id, push_log, trigger="Manual", duration=0, traceback=""):
         try:
-            from frappe.utils import nowdate, nowtime
-
             failed = [r for r in push_log if not r.get("ok")]
             success = [r for r in push_log if r.get("ok")]
 
@@ -460,18 +776,15 @@ class SynchroniseItem(SynchroniseWooCommerce):
 
             item = frappe.get_doc("Item", item_code)
 
-            price_doc = frappe.get_all(
-                "Item Price",
-                filters={"item_code": item_code, "price_list": "Standard Selling"},
-                fields=["price_list_rate"], limit=1
-            )
-            price = price_doc[0].price_list_rate if price_doc else 0.0
+            price = get_standard_selling_price(item_code)
 
-            bins = frappe.get_all("Bin", filters={"item_code": item_code}, fields=["actual_qty"])
-            total_stock = sum(b.actual_qty for b in bins)
+            total_stock = get_item_total_stock(item_code)
 
-            is_bundle = bool(frappe.db.exists("Product Bundle", {"new_item_code": item_code}))
-            compat_data, compat_count = self.build_compatibility_data(item_code)
+            is_bundle = bool(self._get_bundle_for(item_code))
+            if self.ctx and self.ctx.item_code == item_code:
+                compat_count = self.ctx.compat_count
+            else:
+                compat_count = len(self.build_compatibility_rows(item_code))
 
             summary_lines = []
             for r in push_log:
@@ -512,16 +825,11 @@ class SynchroniseItem(SynchroniseWooCommerce):
             frappe.log_error(f"Woo Sync Log write failed: {e}")
 
     def create_bundle_product(self, item, product_id=None):
-
-        import requests
-        import json
-
         try:
-            bundle_name = frappe.db.get_value("Product Bundle", {"new_item_code": item.item.item_code}, "name")
-            if not bundle_name:
+            bundle_doc = self._get_bundle_doc(item.item.item_code)
+            if not bundle_doc:
                 frappe.log_error("No Product Bundle found for item", item.item.item_code)
                 return {}
-            bundle_doc = frappe.get_doc("Product Bundle", bundle_name)
 
             # Ensure all child items exist in WooCommerce first
             self.ensure_children_synced(bundle_doc)
@@ -537,13 +845,10 @@ class SynchroniseItem(SynchroniseWooCommerce):
             if not bundle_items:
                 frappe.log_error("No Product Bundle Items found", item.item.item_code)
                 return {}
+            wc_id_by_code = get_item_woocommerce_ids([bi["item_code"] for bi in bundle_items])
             woosb_ids = {}
             for idx, bi in enumerate(bundle_items):
-                wc_id = frappe.db.get_value(
-                    "Item WooCommerce Server",
-                    {"parent": bi["item_code"]},
-                    "woocommerce_id"
-                )
+                wc_id = wc_id_by_code.get(bi["item_code"])
                 if wc_id:
                     key = f"k{idx}"
                     woosb_ids[key] = {
@@ -598,11 +903,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
         
 
     def clean_slug(self, text, max_length=140):
-        import re
-        import unidecode
-        ascii_text = unidecode.unidecode(text)
-        slug = re.sub(r'[^a-zA-Z0-9]+', '-', ascii_text).strip('-').lower()
-        return slug[:max_length]
+        return _SLUG_RE.sub("-", unidecode.unidecode(text)).strip("-").lower()[:max_length]
     
     # def strip_html(self,html_text: str) -> str:
     #     from bs4 import BeautifulSoup
@@ -613,14 +914,11 @@ class SynchroniseItem(SynchroniseWooCommerce):
     #     )
         
     def strip_html(self, html_text: str) -> str:
-        from bs4 import BeautifulSoup
-        import re
-
         if not html_text:
             return ""
         text = html_text
         text = text.replace("\\n", "\n")
-        text = re.sub(r'^\s*n\s*$', '', text, flags=re.MULTILINE)
+        text = _STRAY_N_LINE_RE.sub("", text)
         soup = BeautifulSoup(text, "html.parser")
         clean_text = soup.get_text(separator="\n")
         lines = [
@@ -632,40 +930,85 @@ class SynchroniseItem(SynchroniseWooCommerce):
         return "\n".join(lines)
             
         
+    def build_item_sync_context(self, item: Item) -> ItemSyncContext:
+        """
+        Compute the parts of the WooCommerce update that only depend on the ERPNext Item
+        """
+        clean_name = item.custom_woo_name__arabic
+        if not clean_name:
+            clean_name = self.clean_product_name(item.item_name)
+
+        wc_attributes = []
+        for attr in item.custom_woo_attribuetes or []:
+            options = []
+            # translated_name = self._cached_translate(attr.name1)
+            translated_name = attr.name1
+            if translated_name =="Compatible":
+                raw_options = attr.values or ""
+                if raw_options:
+                    # translated_opt = self._cached_translate(raw_options)
+                    translated_opt = raw_options
+                    options.append(translated_opt)
+            else:
+                raw_options = (attr.values or "").split(",")
+                for opt in raw_options:
+                    clean_opt = opt.strip()
+                    if clean_opt:
+                        # translated_opt = self._cached_translate(clean_opt)
+                        translated_opt = clean_opt
+                        options.append(translated_opt)
+
+            wc_attributes.append({
+                "id": 0,
+                "name": translated_name,          
+                "visible": bool(attr.visible),
+                "variation": False,
+                "options": options                
+            })
+
+        compat_meta, compat_count = self.build_compatibility_data(item.item_code)
+
+        return ItemSyncContext(
+            item_code=item.item_code,
+            clean_name=clean_name,
+            description=self.strip_html(item.custom_woo_description) if item.custom_woo_description else "",
+            short_description=item.custom_woo__short_description,
+            attributes=wc_attributes,
+            compat_meta=compat_meta,
+            compat_count=compat_count,
+            price=get_standard_selling_price(item.item_code),
+            bins=get_item_bins(item.item_code),
+        )
+
+    def get_item_sync_context(self, item: Item) -> ItemSyncContext:
+        if not self.ctx or self.ctx.item_code != item.item_code:
+            self.ctx = self.build_item_sync_context(item)
+        return self.ctx
+
     def update_woocommerce_product(
         self, wc_product: WooCommerceProduct, item: ERPNextItemToSync
     ) -> None:
         """
         Update the WooCommerce Product with fields from it's corresponding ERPNext Item
         """
-        wc_server = frappe.get_all(
-            "WooCommerce Server",
-            fields=["name", "enable_sync"],
-            limit=1
-        )
-        server = wc_server[0]
-        if not server.enable_sync:
+        if not self.enable_sync:
             return
 
-        import time
         self._push_log = []
+        self._reset_pending_update()
         self._sync_start = time.time()
+        ctx = self.get_item_sync_context(item.item)
 
-        # frappe.log_error("351")
         wc_product_dirty = False
-        is_bundle = frappe.db.exists("Product Bundle", {"new_item_code": item.item.item_code})		
-        raw_name = item.item.item_name
-        clean_name=item.item.custom_woo_name__arabic
-        if not clean_name:
-            clean_name = self.clean_product_name(raw_name)
+        bundle = self._get_bundle_for(item.item.item_code)
+        is_bundle = bool(bundle)
+        clean_name = ctx.clean_name
         if wc_product.woocommerce_name != clean_name and not is_bundle:
             wc_product.woocommerce_name = clean_name[:140]
             wc_product_dirty = True
         if is_bundle:
-            bundle_name = frappe.db.get_value("Product Bundle", {"new_item_code": item.item.item_code}, "name")
-            if bundle_name and wc_product.woocommerce_name !=bundle_name:
-                bundle_doc = frappe.get_doc("Product Bundle", bundle_name)
-                wc_product.woocommerce_name = ((bundle_doc.description or "").strip() or clean_name)[:140]
+            if wc_product.woocommerce_name != bundle.name:
+                wc_product.woocommerce_name = ((bundle.description or "").strip() or clean_name)[:140]
                 wc_product_dirty = True
                 
         # short_slug = self.clean_slug(wc_product.woocommerce_name)
@@ -697,8 +1040,8 @@ class SynchroniseItem(SynchroniseWooCommerce):
         # Push name and slug via API directly — no wc_product.save() needed
         name_to_push = (wc_product.woocommerce_name or clean_name or "")[:140]
         slug_to_push = (wc_product.slug or self.clean_slug(name_to_push))[:140]
-        self._tracked_push(product_id, "name_slug", name=name_to_push, slug=slug_to_push)
-        self._tracked_push(product_id, "sku", sku=item.item.item_code)
+        self._queue_wc_update("name_slug", name=name_to_push, slug=slug_to_push)
+        self._queue_wc_update("sku", sku=item.item.item_code)
 
         # frappe.log_error("item code",item.item.item_code)
 
@@ -709,23 +1052,20 @@ class SynchroniseItem(SynchroniseWooCommerce):
             if image_list:
                 main_image = {"src": image_list[0]}
                 gallery_images = [{"src": url} for url in image_list[1:]]
-                self._tracked_push(product_id, "images", images=[main_image] + gallery_images)
+                self._queue_wc_update("images", images=[main_image] + gallery_images)
         
         # push description
         # description_text = self.build_item_description(item.item.item_code)
-        description=item.item.custom_woo_description
-        description_text=""
-        if description:
-            description_text = self.strip_html(description)
-        short_description=item.item.custom_woo__short_description
-        self._tracked_push(product_id, "description", description=description_text, short_description=short_description)
+        description_text = ctx.description
+        short_description = ctx.short_description
+        self._queue_wc_update("description", description=description_text, short_description=short_description)
         
 
         # Sync shipping class from ERPNext custom field
         shipping_class = item.item.custom_shipping_class or ""
         if shipping_class:
             try:
-                self._tracked_push(product_id, "shipping_class", shipping_class=shipping_class)
+                self._queue_wc_update("shipping_class", shipping_class=shipping_class)
 
                 # frappe.log_error(
                 #     "Shipping class synced",
@@ -737,56 +1077,24 @@ class SynchroniseItem(SynchroniseWooCommerce):
                 )
         
         # Push attributes
-        wc_attributes = []
-        for attr in item.item.custom_woo_attribuetes or []:
-            options = []
-            # translated_name = self.translate_text(attr.name1)
-            translated_name = attr.name1
-            if translated_name =="Compatible":
-                raw_options = attr.values or ""
-                if raw_options:
-                    # translated_opt = self.translate_text(raw_options)
-                    translated_opt = raw_options
-                    options.append(translated_opt)
-            else:
-                raw_options = (attr.values or "").split(",")
-                for opt in raw_options:
-                    clean_opt = opt.strip()
-                    if clean_opt:
-                        # translated_opt = self.translate_text(clean_opt)
-                        translated_opt = clean_opt
-                        options.append(translated_opt)
-
-            wc_attributes.append({
-                "id": 0,
-                "name": translated_name,          
-                "visible": bool(attr.visible),
-                "variation": False,
-                "options": options                
-            })
+        wc_attributes = ctx.attributes
         if wc_attributes:
-            self._tracked_push(product_id, "attributes", attributes=wc_attributes)
+            self._queue_wc_update("attributes", attributes=wc_attributes)
 
 
+        # Fetched once, used for both the branch stock meta and the total stock quantity
+        bins = ctx.bins
+
         # 🏷 Sync Branch-wise Stock dynamically (Normal + Bundle Support)
         try:
             meta_data = {}
-            bundle_name = frappe.db.get_value(
-                "Product Bundle",
-                {"new_item_code": item.item.item_code},
-                "name"
-            )
             warehouse_stock_map = {}
-            if bundle_name:
-                bundle_doc = frappe.get_doc("Product Bundle", bundle_name)
+            if is_bundle:
+                bundle_doc = self._get_bundle_doc(item.item.item_code)
                 for bundle_item in bundle_doc.items:
                     child_code = bundle_item.item_code
                     required_qty = bundle_item.qty or 1
-                    child_bins = frappe.get_all(
-                        "Bin",
-                        filters={"item_code": child_code},
-                        fields=["warehouse", "actual_qty"]
-                    )
+                    child_bins = get_item_bins(child_code)
                     for b in child_bins:
                         if b.actual_qty <= 0:
                             continue
@@ -800,11 +1108,6 @@ class SynchroniseItem(SynchroniseWooCommerce):
                             )
 
             else:
-                bins = frappe.get_all(
-                    "Bin",
-                    filters={"item_code": item.item.item_code},
-                    fields=["warehouse", "actual_qty"]
-                )
                 for b in bins:
                     if b.actual_qty > 0:
                         warehouse_stock_map[b.warehouse] = int(b.actual_qty)
@@ -814,32 +1117,19 @@ class SynchroniseItem(SynchroniseWooCommerce):
                 if qty > 0
             ]
             for index, (warehouse, qty) in enumerate(branch_entries):
-                branch_name = (
-                    warehouse
-                    .lower()
-                    .replace("warehouse", "")
-                    .replace(" - ame", "")
-                    .strip()
-                    .replace(" ", "-") + "-branch"
-                )
-                meta_data[f"branch_stock_{index}_branch"] = branch_name
+                meta_data[f"branch_stock_{index}_branch"] = get_branch_slug(warehouse)
                 meta_data[f"branch_stock_{index}_stock_qty"] = int(qty)
             meta_data["branch_stock"] = len(branch_entries)
             if meta_data:
-                self._tracked_push(product_id, "branch_stock", meta=meta_data)
+                self._queue_wc_update("branch_stock", meta=meta_data)
             else:
-                frappe.log_error("No Branch Stock Found", item.item.item_code)
+                log_sync_debug("No Branch Stock Found", item.item.item_code)
         except Exception as e:
             frappe.log_error("Branch Stock Sync Failed", str(e))
 
         
         try:
-            bins = frappe.get_all(
-                "Bin",
-                filters={"item_code": item.item.item_code},
-                fields=["actual_qty"]
-            )
-            total_qty = sum([b.actual_qty for b in bins])
+            total_qty = sum(b.actual_qty for b in bins)
 
             if total_qty > 0:
                 stock_status = "instock"
@@ -847,7 +1137,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
             else:
                 stock_status = "onbackorder"  
                 backorders = "notify"         
-            self._tracked_push(product_id, "stock", manage_stock=True, stock_quantity=int(total_qty), stock_status=stock_status, backorders=backorders)
+            self._queue_wc_update("stock", manage_stock=True, stock_quantity=int(total_qty), stock_status=stock_status, backorders=backorders)
 
             # frappe.log_error(
             #     "Stock synced",
@@ -860,33 +1150,12 @@ class SynchroniseItem(SynchroniseWooCommerce):
 
         # 🏷 Sync Price 
         try:
-            from frappe.utils import getdate
-            from datetime import date
-            price_doc = frappe.get_all(
-                "Item Price",
-                filters={
-                    "item_code": item.item.item_code,
-                    "price_list": "Standard Selling"
-                },
-                fields=["price_list_rate"],
-                limit=1
-            )
-
-            original_price = price_doc[0].price_list_rate if price_doc else 0.0
+            original_price = ctx.price
             sale_price = original_price
-            offer_name = frappe.db.get_value(
-                "WooCommerce Server",
-                self.server_doc.name,
-                "custom_offer_list"
-            )
-
-            exclude_doc_name = frappe.db.get_value(
-                "WooCommerce Server",
-                self.server_doc.name,
-                "custom_exclude_offer_list"
-            )
-            offer = frappe.get_doc("POS Offer", offer_name) if offer_name else None
-            exclude_doc = frappe.get_doc("Exclude Offer", exclude_doc_name) if exclude_doc_name else None
+            offer_name = self.server_doc.custom_offer_list
+            exclude_doc_name = self.server_doc.custom_exclude_offer_list
+            offer = frappe.get_cached_doc("POS Offer", offer_name) if offer_name else None
+            exclude_doc = frappe.get_cached_doc("Exclude Offer", exclude_doc_name) if exclude_doc_name else None
             is_globally_excluded = False
             if exclude_doc:
                 for row in exclude_doc.item_exclude_from_all_offer:
@@ -960,7 +1229,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
                         #     Sale Price: {sale_price}
                         #     """
                         # )
-            self._tracked_push(product_id, "price", regular_price=str(round(original_price, 2)), sale_price=str(round(sale_price, 2)))
+            self._queue_wc_update("price", regular_price=str(round(original_price, 2)), sale_price=str(round(sale_price, 2)))
             # frappe.log_error(
             #     "Price Synced",
             #     f"Item: {item.item.item_code}, Regular: {original_price}, Sale: {sale_price}"
@@ -1000,154 +1269,126 @@ class SynchroniseItem(SynchroniseWooCommerce):
 
         # if compatibility_entries:
         #     is_spare_part = True
-        self._tracked_push(product_id, "spare_part", meta={"mark_spare_part": "1" if is_spare_part else "0"})
+        self._queue_wc_update("spare_part", meta={"mark_spare_part": "1" if is_spare_part else "0"})
 
         
         # ✅ Build compatibility data dynamically from ERPNext child table
-        meta_data, count = self.build_compatibility_data(item.item.item_code)
+        meta_data, count = dict(ctx.compat_meta), ctx.compat_count
         if count > 0:
             meta_data["add_compactable_details"] = str(count)
             meta_data["_add_compactable_details"] = "field_68e38a56a4d82"
-            self._tracked_push(product_id, "compatibility", meta=meta_data)
+            self._queue_wc_update("compatibility", meta=meta_data)
 
             # frappe.log_error("Compatibility Synced",
             #                 f"Item: {item.item.item_name}, Total Rows: {count}")
         else:
-            frappe.log_error("No Compatibility Found", item.item.item_name)
+            log_sync_debug("No Compatibility Found", item.item.item_name)
             
             
         # ✅ Universal Product (ACF True/False)
         is_universal = "1" if count == 0 else "0"
         # frappe.log_error("is_universal",is_universal)
-        self._tracked_push(product_id, "universal_product", meta={"universal_product": is_universal, "_universal_product": "field_69cf69755b698"})
+        self._queue_wc_update("universal_product", meta={"universal_product": is_universal, "_universal_product": "field_69cf69755b698"})
         
         # # --- Push product categories ---
         categories = []
 
         main_cat = (item.item.category or "").strip()
         sub_cat = (item.item.sub_category or "").strip()
-        main_cat_ar = self.translate_text(main_cat) if main_cat else ""
-        sub_cat_ar = self.translate_text(sub_cat) if sub_cat else ""
+        self.prefetch_translations([main_cat, sub_cat])
+        main_cat_ar = self._cached_translate(main_cat) if main_cat else ""
+        sub_cat_ar = self._cached_translate(sub_cat) if sub_cat else ""
         if main_cat_ar:
             parent_id = self.get_or_create_wc_category(main_cat_ar)  
             categories.append({"id": parent_id})
             if sub_cat_ar:
                 child_id = self.get_or_create_wc_category(sub_cat_ar, parent_id)
                 categories.append({"id": child_id})
-        categories = [dict(t) for t in {tuple(d.items()) for d in categories}]
-        if categories:
-            try:
-                self._tracked_push(product_id, "categories", categories=categories)
-                # frappe.log_error(
-                #     "Categories Synced",
-                #     f"Item: {item.item.item_name}, Categories: {categories}"
-                # )
-            except Exception:
-                frappe.log_error(
-                    "❌ Failed to sync categories ",
-                    f"{item.item.item_name}\n{frappe.get_traceback()}"
-                )
-        
-        # Push offer_category
+        # De-duplicate while keeping the parent category ahead of its child
+        categories = list({c["id"]: c for c in categories}.values())
+
+        # Offer categories are always sent, so removing every offer clears them on WooCommerce
         offer_categories = []
         for offer in item.item.custom_offer_categories or []:
-            offer_name = offer.offer_name
-            offer_id = self.get_or_create_wc_offer_category(offer_name)
+            offer_id = self.get_or_create_wc_offer_category(offer.offer_name)
             offer_categories.append(offer_id)
-            
-        self._tracked_push(product_id, "offer_category", offer_category=offer_categories)
-            # frappe.log_error("offer category pushed",offer_categories)
-        
+
+        category_fields = {"offer_category": offer_categories}
+        if categories:
+            category_fields["categories"] = categories
+        self._queue_wc_update("categories", **category_fields)
+
         #  Sync "Bought Together" Items
         try:
             current_item_code = item.item.item_code
             wc_ids=[]
-            invoices = frappe.get_all(
-                "Sales Invoice Item",
-                filters={"item_code": current_item_code, "parenttype": "Sales Invoice"},
-                fields=["parent"],
-                distinct=True,
-                order_by="modified desc",
-                limit=1000
-            )
-
-            if invoices:
-                invoice_names = [inv.parent for inv in invoices]
-                items = frappe.get_all(
-                    "Sales Invoice Item",
-                    filters={"parent": ["in", invoice_names], "item_code": ["!=", current_item_code]},
-                    fields=["item_code"]
-                )
+            # Top 3 items sold on the latest 1000 invoices of this item, counted in SQL
+            sii = frappe.qb.DocType("Sales Invoice Item")
+            recent_invoices = (
+                frappe.qb.from_(sii)
+                .select(sii.parent)
+                .distinct()
+                .where(sii.item_code == current_item_code)
+                .where(sii.parenttype == "Sales Invoice")
+                .orderby(sii.modified, order=Order.desc)
+                .limit(1000)
+            ).as_("recent_invoices")
+            top_items = (
+                frappe.qb.from_(sii)
+                .join(recent_invoices)
+                .on(sii.parent == recent_invoices.parent)
+                .select(sii.item_code, Count(sii.name).as_("c"))
+                .where(sii.item_code != current_item_code)
+                .groupby(sii.item_code)
+                .orderby(Count(sii.name), order=Order.desc)
+                .limit(3)
+            ).run(pluck=True)
+
+            if top_items:
+                wc_id_by_code = get_item_woocommerce_ids(top_items)
+                wc_ids = [str(wc_id_by_code[code]) for code in top_items if code in wc_id_by_code]
+
+                if wc_ids:
+                    self._queue_wc_update("bought_together", bundle_product_items=wc_ids)
+                    # frappe.log_error(
+                    #     "✅ Bought Together Synced",
+                    #     f"Item: {current_item_code}, Bundle Product Items: {wc_ids}"
+                    # )
 
-                from collections import Counter
-                item_counts = Counter([i.item_code for i in items])
-                top_items = [code for code, _ in item_counts.most_common(3)]
-
-                if top_items:
-                    wc_ids = []
-                    for code in top_items:
-                        wc_id = frappe.db.get_value(
-                            "Item WooCommerce Server",
-                            {"parent": code, "woocommerce_id": ["is", "set"]},
-                            "woocommerce_id"
-                        )
-                        if wc_id:
-                            wc_ids.append(str(wc_id))
+            if not wc_ids:
+                wc_ids = get_random_woocommerce_ids(3)
 
-                    if wc_ids:
-                        self._tracked_push(product_id, "bought_together", bundle_product_items=wc_ids)
-                        # frappe.log_error(
-                        #     "✅ Bought Together Synced",
-                        #     f"Item: {current_item_code}, Bundle Product Items: {wc_ids}"
-                        # )
-
-            if not invoices or not wc_ids:
-                random_items = frappe.get_all(
-                    "Item WooCommerce Server",
-                    filters={"woocommerce_id": ["is", "set"]},
-                    fields=["parent", "woocommerce_id"],
-                    order_by="RAND()",
-                    limit=3
-                )
-
-                if random_items:
-                    wc_ids = [str(i["woocommerce_id"]) for i in random_items if i.get("woocommerce_id")]
-                    self._tracked_push(product_id, "bought_together_random", bundle_product_items=wc_ids)
+                if wc_ids:
+                    self._queue_wc_update(
+                        "bought_together_random", volatile=True, bundle_product_items=wc_ids
+                    )
                     # frappe.log_error(
                     #     " No invoices found — pushed random Bought Together items",
                     #     f"Item: {current_item_code}, Random Bundle Product Items: {wc_ids}"
                     # )
                 else:
-                    frappe.log_error(" No random items available for Bought Together fallback", current_item_code)
+                    log_sync_debug("No random items available for Bought Together fallback", current_item_code)
 
         except Exception as e:
             frappe.log_error("❌ Bought Together Sync Failed", str(e))
         
         # push description
-        self._tracked_push(product_id, "description_final", description=description_text, short_description=short_description)
+        self._queue_wc_update("description_final", description=description_text, short_description=short_description)
 
         # ✅ push manufacturer brand
         brand = item.item.brand or ""
         # frappe.log_error("brand",brand)
         if brand:
-            self._tracked_push(product_id, "brand", meta={"manufacturer_brand": brand, "_manufacturer_brand": "field_69ce4ef9cd32d"})
+            self._queue_wc_update("brand", meta={"manufacturer_brand": brand, "_manufacturer_brand": "field_69ce4ef9cd32d"})
         # ✅ Rebuild woosb_ids for bundle products
-        if frappe.db.exists("Product Bundle", {"new_item_code": item.item.item_code}):
+        if is_bundle:
             try:
-                bundle_name = frappe.db.get_value(
-                    "Product Bundle",
-                    {"new_item_code": item.item.item_code},
-                    "name"
-                )
-                bundle_doc = frappe.get_doc("Product Bundle", bundle_name)
+                bundle_doc = self._get_bundle_doc(item.item.item_code)
                 self.ensure_children_synced(bundle_doc)
+                wc_id_by_code = get_item_woocommerce_ids([bi.item_code for bi in bundle_doc.items])
                 woosb_ids = {}
                 for idx, bi in enumerate(bundle_doc.items):
-                    wc_id = frappe.db.get_value(
-                        "Item WooCommerce Server",
-                        {"parent": bi.item_code},
-                        "woocommerce_id"
-                    )
+                    wc_id = wc_id_by_code.get(bi.item_code)
                     if wc_id:
                         woosb_ids[f"k{idx}"] = {
                             "id": str(wc_id),
@@ -1157,15 +1398,65 @@ class SynchroniseItem(SynchroniseWooCommerce):
                             "max": ""
                         }
                 if woosb_ids:
-                    self._tracked_push(product_id, "woosb_ids", meta=[{"key": "woosb_ids", "value": woosb_ids}])
+                    self._queue_wc_update("woosb_ids", meta=[{"key": "woosb_ids", "value": woosb_ids}])
             except Exception as e:
                 frappe.log_error("woosb_ids rebuild failed", str(e))
 
         # ✅ Sync Kit Options (Position / Side / Type)
         # ✅ Sync Kit Options (Position / Side / Type)
-        if frappe.db.exists("Product Bundle", {"new_item_code": item.item.item_code}):
+        if is_bundle:
             self.sync_kit_options(item, product_id)
 
+        self.push_pending_update(product_id)
+
+    def push_pending_update(self, product_id) -> None:
+        """
+        Push the queued update of self.item, unless it matches the last pushed payload.
+
+        The digest is kept in woocommerce_payload_hash, apart from the woocommerce_last_sync_hash
+        written by set_sync_hash. Edits made directly in WooCommerce are therefore only overwritten
+        once the ERPNext data changes, or when clear_sync_hash_and_run_item_sync forces a push.
+        """
+        item = self.item
+        # Skip the push when nothing changed since the last successful push
+        digest = self.pending_payload_fingerprint()
+        if digest == item.item_woocommerce_server.woocommerce_payload_hash:
+            self._reset_pending_update()
+            log_sync_debug("Product unchanged, push skipped", item.item.item_code)
+            return
+
+        if self.defer_push:
+            # run_item_sync_for_servers_in_parallel sends the PUT, then calls complete_deferred_push
+            payload, field_labels = self._build_pending_payload(), self._pending_fields
+            self._reset_pending_update()
+            self.deferred_push = (product_id, digest, payload, field_labels)
+            return
+
+        self.finish_wc_push(product_id, digest, self.flush_wc_product(product_id))
+
+    def complete_deferred_push(self, result: Optional[dict]) -> None:
+        """
+        Record the outcome of the PUT sent for deferred_push: sync hash and Woo Sync Log
+        """
+        product_id, digest, payload, field_labels = self.deferred_push
+        self.deferred_push = None
+        if field_labels:
+            result = self.record_wc_push(result, product_id, payload, field_labels)
+        self.finish_wc_push(product_id, digest, result or {})
+
+    def finish_wc_push(self, product_id, digest, result: dict) -> None:
+        item = self.item
+        # Without its images the product still differs from the payload, so keep pushing it
+        if result.get("ok") and not result.get("images_rejected") and item.item_woocommerce_server.name:
+            frappe.db.set_value(
+                "Item WooCommerce Server",
+                item.item_woocommerce_server.name,
+                "woocommerce_payload_hash",
+                digest,
+                update_modified=False,
+            )
+            item.item_woocommerce_server.woocommerce_payload_hash = digest
+
         # ✅ Log sync result to Woo Sync Log
         duration = time.time() - self._sync_start
         self.log_sync_result(
@@ -1176,50 +1467,33 @@ class SynchroniseItem(SynchroniseWooCommerce):
             duration=duration
         )
             
-    import re
     def contains_arabic(self,text):
-        return bool(re.search(r'[\u0600-\u06FF]', text))
+        return bool(_ARABIC_RE.search(text))
 
     def extract_english(self, text):
-        eng = re.findall(r"[A-Za-z0-9\-\/\(\)\[\]\'\"\.\,\&\+\s]+", text)
-        eng_clean = " ".join(eng).strip()
-        if re.fullmatch(r"[-\/\(\)\[\]\'\"\.\,\&\+\s]*", eng_clean):
+        eng_clean = " ".join(_ENG_RUN_RE.findall(text)).strip()
+        if _ENG_PUNCT_ONLY_RE.fullmatch(eng_clean):
             return ""
 
         return eng_clean
+
     def clean_product_name(self, name):
+        # The English part wins whether or not the name also has Arabic, so one scan is enough
         name = name.strip()
-        english_part = self.extract_english(name)
-        has_arabic = self.contains_arabic(name)
-        if has_arabic and not english_part:
-            return name
-        if english_part and has_arabic:
-            return english_part
-        if english_part:
-            return english_part
-        return name
+        return self.extract_english(name) or name
       
     # description from compatability        
     def build_item_description(self, item_code):
-        item = frappe.get_doc("Item", item_code)
+        item = frappe.db.get_value("Item", item_code, ["item_name", "item_code"], as_dict=True)
         lines = []
 
         title = item.item_name or item.item_code
         lines.append(title)
 
-        meta_data, count = self.build_compatibility_data(item_code)
-
-        if count == 0:
-            return "\n".join(lines)
-
-        for i in range(count):
-            brand = meta_data.get(f"add_compactable_details_{i}_brand", "")
-            model = meta_data.get(f"add_compactable_details_{i}_model", "")
-            years = meta_data.get(f"add_compactable_details_{i}_years", "")
-
+        for row in self.build_compatibility_rows(item_code):
             part_line = (
-                f"Brand - {brand}&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;"
-                f"Model - {model}&nbsp;&nbsp;&nbsp;- {years}"
+                f"Brand - {row['brand']}&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;"
+                f"Model - {row['model']}&nbsp;&nbsp;&nbsp;- {row['years']}"
             )
 
             lines.append(part_line)
@@ -1237,27 +1511,54 @@ class SynchroniseItem(SynchroniseWooCommerce):
             {"source_text": arabic_text},
             "translated_text"
         )
-        return translated or arabic_text 
+        return translated or arabic_text
+
+    def _cached_translate(self, text):
+        """
+        translate_text, memoised for the lifetime of this sync instance
+        """
+        if text not in self._translate_cache:
+            self._translate_cache[text] = self.translate_text(text)
+        return self._translate_cache[text]
+
+    def prefetch_translations(self, texts):
+        """
+        Load the translations of several texts into the translate cache with one query
+        """
+        needed = {text for text in texts if text and text not in self._translate_cache}
+        if not needed:
+            return
+        found = {}
+        for row in frappe.get_all(
+            "Translation",
+            filters={"source_text": ["in", list(needed)]},
+            fields=["source_text", "translated_text"],
+        ):
+            found.setdefault(row.source_text, row.translated_text)
+        for text in needed:
+            self._translate_cache[text] = found.get(text) or text
 
           
     # compatability      
-    def build_compatibility_data(self, item_code):
-        meta_data = {}
+    def build_compatibility_rows(self, item_code):
+        """
+        Return the Item's compatibility as a list of dicts with brand, model, years, variant and
+        engine_size. Bundles without their own rows use their children's rows.
+        """
         compatibility_entries = []
 
-        main_item = frappe.get_doc("Item", item_code)
-        main_compat = main_item.get("custom_compatibility") or []
+        main_compat = get_item_compatibility(item_code)
 
-        is_bundle = frappe.db.exists("Product Bundle", {"new_item_code": item_code})
+        is_bundle = self._get_bundle_for(item_code)
 
         if is_bundle:
             if not main_compat:
                 # frappe.log_error("Bundle without comp")
-                bundle = frappe.get_doc("Product Bundle", {"new_item_code": item_code})
+                bundle = self._get_bundle_doc(item_code)
 
+                compat_by_child = get_items_compatibility([child.item_code for child in bundle.items])
                 for child in bundle.items:
-                    child_item = frappe.get_doc("Item", child.item_code)
-                    child_compat = child_item.get("custom_compatibility") or []
+                    child_compat = compat_by_child.get(child.item_code)
 
                     if child_compat:
                         compatibility_entries.extend(child_compat)
@@ -1266,9 +1567,8 @@ class SynchroniseItem(SynchroniseWooCommerce):
         else:
             compatibility_entries = main_compat
 
-        if not compatibility_entries:
-            return {}, 0
-        for index, row in enumerate(compatibility_entries):
+        rows = []
+        for row in compatibility_entries:
             expanded_years = ""
             if row.years:
                 try:
@@ -1279,17 +1579,21 @@ class SynchroniseItem(SynchroniseWooCommerce):
             # brand = self.translate_text(row.brand or "")
             # model = self.translate_text(row.model or "")
             # fuel = self.translate_text(row.fuel or "")
+            rows.append({
+                "brand": row.brand or "",
+                "model": row.model or "",
+                "years": expanded_years,
+                "variant": row.fuel or "",
+                "engine_size": row.engine_size or "",
+            })
+        return rows
 
-            # meta_data[f"add_compactable_details_{index}_brand"] = brand
-            # meta_data[f"add_compactable_details_{index}_model"] = model
-            meta_data[f"add_compactable_details_{index}_brand"] = row.brand or ""
-            meta_data[f"add_compactable_details_{index}_model"] = row.model or ""
-            meta_data[f"add_compactable_details_{index}_years"] = expanded_years
-            # meta_data[f"add_compactable_details_{index}_variant"] = fuel
-            meta_data[f"add_compactable_details_{index}_variant"] = row.fuel or ""
-            meta_data[f"add_compactable_details_{index}_engine_size"] = row.engine_size or ""
-
-        return meta_data, len(compatibility_entries)
+    def build_compatibility_data(self, item_code):
+        """
+        Compatibility as flat add_compactable_details_<n>_<field> WooCommerce meta, with the row count
+        """
+        rows = self.build_compatibility_rows(item_code)
+        return compatibility_rows_to_meta(rows), len(rows)
 
 
 
@@ -1298,12 +1602,17 @@ class SynchroniseItem(SynchroniseWooCommerce):
             
     def get_or_create_wc_category(self, name, parent_id=0):
         """Get category ID by name or create if not exists."""
+        cache_key = (self.wc_base_url, "product_cat", name.lower(), parent_id or 0)
+        category_id = get_cached_wc_category_id(cache_key)
+        if category_id:
+            return category_id
         try:
             # 1️⃣ Try to find category by name
             existing = self.wcapi.get("products/categories", params={"search": name}).json()
             # frappe.log_error("existing",existing)
             for cat in existing:
                 if cat["name"].lower() == name.lower():
+                    cache_wc_category_id(cache_key, cat["id"])
                     return cat["id"]
 
             # 2️⃣ Not found → create new category
@@ -1312,6 +1621,8 @@ class SynchroniseItem(SynchroniseWooCommerce):
                 "parent": parent_id or 0
             }
             res = self.wcapi.post("products/categories", new_cat).json()
+            if res.get("id"):
+                cache_wc_category_id(cache_key, res["id"])
             return res.get("id")
 
         except Exception as e:
@@ -1319,30 +1630,23 @@ class SynchroniseItem(SynchroniseWooCommerce):
             return None
     
     def get_or_create_wc_offer_category(self, name):
-        import requests, re, unicodedata
-
         """Fetch existing offer categories from custom taxonomy wp/v2/offer_category"""
+        cache_key = (self.wc_base_url, "offer_category", name.lower(), 0)
+        category_id = get_cached_wc_category_id(cache_key)
+        if category_id:
+            return category_id
         try:
             # Normalize input name into slug form, e.g. "New Arrivals" → "new-arrivals"
             def slugify(value):
                 value = unicodedata.normalize('NFKD', value)
                 value = value.encode('ascii', 'ignore').decode('utf-8')
-                value = re.sub(r'[^a-zA-Z0-9]+', '-', value)
+                value = _SLUG_RE.sub("-", value)
                 return value.strip('-').lower()
 
             search_slug = slugify(name)
-            servers = frappe.get_all(
-                "WooCommerce Server",
-                fields=["woocommerce_server_url", "api_consumer_key", "api_consumer_secret", "enable_sync"],
-                filters={"enable_sync": 1},
-                limit=1
-            )
-            if servers and len(servers) > 0:
-                server = servers[0] if isinstance(servers[0], dict) else servers[0].as_dict()  
-                wc_base_url = server.get("woocommerce_server_url", "").rstrip("/")
-                
+
             # url = f"https://demo.mrkbatx.com/wp-json/wp/v2/offer_category?search={search_slug}"
-            url = f"{wc_base_url}/wp-json/wp/v2/offer_category?search={search_slug}"
+            url = f"{self.wc_base_url}/wp-json/wp/v2/offer_category?search={search_slug}"
             # frappe.log_error("url for create category",url)
             response = requests.get(url, auth=(self.consumer_key, self.consumer_secret))
 
@@ -1356,6 +1660,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
                 # Match either by name or slug
                 if cat_name == name.lower() or cat_slug == search_slug:
                     # frappe.log_error(f"Matched offer category '{name}' to ID {cat['id']}", "")
+                    cache_wc_category_id(cache_key, cat["id"])
                     return cat["id"]
 
             frappe.log_error(f"Offer category '{name}' not found. Manual creation needed.", "")
@@ -1372,7 +1677,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
         Fully robust against missing data and ensures wc_product is always valid.
         """
         wc_product = None
-        is_bundle = frappe.db.exists("Product Bundle", {"new_item_code": item.item.item_code})
+        is_bundle = self._get_bundle_for(item.item.item_code)
         if is_bundle:
             # frappe.log_error("its a bundle")
             self.create_bundle_product(item, getattr(item.item_woocommerce_server, "woocommerce_id", None))
@@ -1397,19 +1702,24 @@ class SynchroniseItem(SynchroniseWooCommerce):
             if item.item.has_variants:
                 wc_product.type = "variable"
                 attributes_list = []
+                attribute_names = [row.attribute for row in item.item.attributes]
+                options_by_attribute = {name: [] for name in attribute_names}
+                if attribute_names:
+                    for value in frappe.get_all(
+                        "Item Attribute Value",
+                        filters={"parent": ["in", attribute_names], "parenttype": "Item Attribute"},
+                        fields=["parent", "attribute_value"],
+                        order_by="idx asc",
+                    ):
+                        options_by_attribute[value.parent].append(value.attribute_value)
                 for row in item.item.attributes:
-                    try:
-                        item_attr = frappe.get_doc("Item Attribute", row.attribute)
-                        options = [val.attribute_value for val in item_attr.item_attribute_values]
-                        attributes_list.append({
-                            "name": row.attribute,
-                            "slug": row.attribute.lower().replace(" ", "_"),
-                            "visible": True,
-                            "variation": True,
-                            "options": options,
-                        })
-                    except Exception as e:
-                        frappe.log_error(f"Error loading attribute {row.attribute}: {e}")
+                    attributes_list.append({
+                        "name": row.attribute,
+                        "slug": row.attribute.lower().replace(" ", "_"),
+                        "visible": True,
+                        "variation": True,
+                        "options": options_by_attribute[row.attribute],
+                    })
                 wc_product.attributes = json.dumps(attributes_list)
                 
         raw_name = item.item.item_name
@@ -1442,108 +1752,35 @@ class SynchroniseItem(SynchroniseWooCommerce):
             frappe.log_error("Failed to update WooCommerce product after creation", str(e))
         self.set_sync_hash()
 
-
     def create_item(self, wc_product: WooCommerceProduct) -> None:
         """
-        Create an ERPNext Item from the given WooCommerce Product
+        Creating ERPNext Items from WooCommerce Products is disabled, Items are only synced ERPNext → WooCommerce
         """
-        return # added bcs no need to sync from woo-to-erp
-  
-        wc_server = frappe.get_cached_doc("WooCommerce Server", wc_product.woocommerce_server)
-
-        # Create Item
-        item = frappe.new_doc("Item")
-
-        # Handle variants' attributes
-        if wc_product.type in ["variable", "variation"]:
-            self.create_or_update_item_attributes(wc_product)
-            wc_attributes = json.loads(wc_product.attributes)
-            for wc_attribute in wc_attributes:
-                row = item.append("attributes")
-                row.attribute = wc_attribute["name"]
-                if wc_product.type == "variation":
-                    row.attribute_value = wc_attribute["option"]
-        # Handle variants
-        if wc_product.type == "variable":
-            item.has_variants = 1
-
-        if wc_product.type == "variation":
-            # Check if parent exists
-            woocommerce_product_name = generate_woocommerce_record_name_from_domain_and_id(
-                wc_product.woocommerce_server, wc_product.parent_id
-            )
-            parent_item, parent_wc_product = run_item_sync(
-                woocommerce_product_name=woocommerce_product_name
-            )
-            item.variant_of = parent_item.item_code
-
-        item.item_code = (
-            wc_product.sku
-            if wc_server.name_by == "Product SKU" and wc_product.sku
-            else str(wc_product.woocommerce_id)
-        )
-        item.stock_uom = wc_server.uom or _("Nos")
-        item.item_group = wc_server.item_group
-        item.item_name = wc_product.woocommerce_name
-        row = item.append("woocommerce_servers")
-        row.woocommerce_id = wc_product.woocommerce_id
-        row.woocommerce_server = wc_server.name
-        item.flags.ignore_mandatory = True
-        item.flags.created_by_sync = True
-
-        if wc_server.enable_image_sync:
-            wc_product_images = json.loads(wc_product.images)
-            if len(wc_product_images) > 0:
-                item.image = wc_product_images[0]["src"]
-
-        modified, item = self.set_item_fields(item=item)
-        item.flags.created_by_sync = True
-
-        item.insert()
-
-        self.item = ERPNextItemToSync(
-            item=item,
-            item_woocommerce_server_idx=next(
-                iws.idx
-                for iws in item.woocommerce_servers
-                if iws.woocommerce_server == wc_product.woocommerce_server
-            ),
-        )
+        return None
 
-        self.set_sync_hash()
+    def _wc_server(self, server_name: str):
+        """
+        WooCommerce Server document, memoised for the lifetime of this sync instance
+        """
+        if server_name not in self._wc_server_cache:
+            self._wc_server_cache[server_name] = frappe.get_cached_doc("WooCommerce Server", server_name)
+        return self._wc_server_cache[server_name]
 
-    def create_or_update_item_attributes(self, wc_product: WooCommerceProduct):
+    def _item_field_map(self, server_name: str) -> List[tuple]:
         """
-        Create or update an Item Attribute
+        The server's Field Mappings as (ERPNext field name, WooCommerce field name, parsed JSONPath)
         """
-        if wc_product.attributes:
-            wc_attributes = json.loads(wc_product.attributes)
-            for wc_attribute in wc_attributes:
-                if frappe.db.exists("Item Attribute", wc_attribute["name"]):
-                    item_attribute = frappe.get_doc("Item Attribute", wc_attribute["name"])
-                else:
-                    item_attribute = frappe.get_doc(
-                        {"doctype": "Item Attribute", "attribute_name": wc_attribute["name"]}
-                    )
-                options = (
-                    wc_attribute["options"] if wc_product.type == "variable" else [wc_attribute["option"]]
+        if server_name not in self._field_map_cache:
+            self._field_map_cache[server_name] = [
+                (
+                    map.erpnext_field_name.split(" | ")[0],
+                    map.woocommerce_field_name,
+                    # We expect woocommerce_field_name to be valid JSONPath
+                    compile_jsonpath(map.woocommerce_field_name),
                 )
-
-                if len(item_attribute.item_attribute_values) == 0 or (
-                    len(item_attribute.item_attribute_values) > 0
-                    and set(options) != set([val.attribute_value for val in item_attribute.item_attribute_values])
-                ):
-                    item_attribute.item_attribute_values = []
-                    for option in options:
-                        row = item_attribute.append("item_attribute_values")
-                        row.attribute_value = option
-                        row.abbr = option.replace(" ", "")
-
-                item_attribute.flags.ignore_mandatory = True
-                if not item_attribute.name:
-                    item_attribute.insert()
-                else:
-                    item_attribute.save()
+                for map in self._wc_server(server_name).item_field_map
+            ]
+        return self._field_map_cache[server_name]
 
     def set_item_fields(self, item: Item) -> Tuple[bool, Item]:
         """
@@ -1552,23 +1789,17 @@ class SynchroniseItem(SynchroniseWooCommerce):
         """
         item_dirty = False
         if item and self.woocommerce_product:
-            wc_server = frappe.get_cached_doc(
-                "WooCommerce Server", self.woocommerce_product.woocommerce_server
-            )
-            if wc_server.item_field_map:
+            field_map = self._item_field_map(self.woocommerce_product.woocommerce_server)
+            if field_map:
                 woocommerce_product_dict = (
                     self.woocommerce_product.deserialize_attributes_of_type_dict_or_list(
                         self.woocommerce_product.to_dict()
                     )
                 )
-                for map in wc_server.item_field_map:
-                    erpnext_item_field_name = map.erpnext_field_name.split(" | ")
-
-                    # We expect woocommerce_field_name to be valid JSONPath
-                    jsonpath_expr = parse(map.woocommerce_field_name)
+                for erpnext_field_name, woocommerce_field_name, jsonpath_expr in field_map:
                     woocommerce_product_field_matches = jsonpath_expr.find(woocommerce_product_dict)
 
-                    setattr(item, erpnext_item_field_name[0], woocommerce_product_field_matches[0].value)
+                    setattr(item, erpnext_field_name, woocommerce_product_field_matches[0].value)
                     item_dirty = True
         return item_dirty, item
 
@@ -1583,8 +1814,8 @@ class SynchroniseItem(SynchroniseWooCommerce):
         """
         wc_product_dirty = False
         if item and woocommerce_product:
-            wc_server = frappe.get_cached_doc("WooCommerce Server", woocommerce_product.woocommerce_server)
-            if wc_server.item_field_map:
+            field_map = self._item_field_map(woocommerce_product.woocommerce_server)
+            if field_map:
 
                 # Deserialize the WooCommerce Product's list and dict fields because we want to potentially perform
                 # in-place updates on the whole dict using jsonpath-ng. Use the existing class method for this.
@@ -1592,12 +1823,9 @@ class SynchroniseItem(SynchroniseWooCommerce):
                     woocommerce_product.deserialize_attributes_of_type_dict_or_list(woocommerce_product)
                 )
 
-                for map in wc_server.item_field_map:
-                    erpnext_item_field_name = map.erpnext_field_name.split(" | ")
-                    erpnext_item_field_value = getattr(item.item, erpnext_item_field_name[0])
+                for erpnext_field_name, woocommerce_field_name, jsonpath_expr in field_map:
+                    erpnext_item_field_value = getattr(item.item, erpnext_field_name)
 
-                    # We expect woocommerce_field_name to be valid JSONPath
-                    jsonpath_expr = parse(map.woocommerce_field_name)
                     woocommerce_product_field_matches = jsonpath_expr.find(wc_product_with_deserialised_fields)
 
                     if len(woocommerce_product_field_matches) == 0:
@@ -1605,7 +1833,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
                             # We're strict about existing WooCommerce Products, the field should exist
                             raise ValueError(
                                 _("Field <code>{0}</code> not found in WooCommerce Product {1}").format(
-                                    map.woocommerce_field_name, woocommerce_product.name
+                                    woocommerce_field_name, woocommerce_product.name
                                 )
                             )
                         else:
@@ -1634,33 +1862,55 @@ class SynchroniseItem(SynchroniseWooCommerce):
         frappe.db.set_value(
             "Item WooCommerce Server",
             self.item.item_woocommerce_server.name,
-            "woocommerce_last_sync_hash",
-            self.woocommerce_product.woocommerce_date_modified,
-            update_modified=False,
-        )
-        frappe.db.set_value(
-            "Item WooCommerce Server",
-            self.item.item_woocommerce_server.name,
-            "enabled",
-            1,
+            {
+                "woocommerce_last_sync_hash": self.woocommerce_product.woocommerce_date_modified,
+                "enabled": 1,
+            },
             update_modified=False,
         )
+
+    def _get_bundle_for(self, item_code):
+        """
+        Return the Product Bundle (name and description) whose new_item_code is item_code, or None
+        """
+        if item_code not in self._bundle_cache:
+            bundle = None
+            # A prefetched sync context already knows which items are not bundles
+            cache = _get_sync_cache(item_code)
+            if not cache or item_code in cache.bundles:
+                bundle = frappe.db.get_value(
+                    "Product Bundle",
+                    {"new_item_code": item_code},
+                    ["name", "description"],
+                    as_dict=True,
+                )
+            self._bundle_cache[item_code] = bundle
+        return self._bundle_cache[item_code]
+
+    def _get_bundle_doc(self, item_code):
+        """
+        Return the full Product Bundle document for item_code, only loaded when its items are needed
+        """
+        bundle = self._get_bundle_for(item_code)
+        if not bundle:
+            return None
+        if bundle.name not in self._bundle_doc_cache:
+            self._bundle_doc_cache[bundle.name] = frappe.get_cached_doc("Product Bundle", bundle.name)
+        return self._bundle_doc_cache[bundle.name]
+
     def ensure_children_synced(self, bundle_doc):
         """
         Ensure every child item of a bundle exists in WooCommerce (has an ID).
         Syncs any child missing a woocommerce_id so the bundle can reference it.
         Skips children that are themselves bundles (avoids recursion).
         """
-        from woocommerce_fusion.tasks.sync_items import run_item_sync
         for row in bundle_doc.items:
             child_code = row.item_code
-            wc_id = frappe.db.get_value(
-                "Item WooCommerce Server", {"parent": child_code}, "woocommerce_id"
-            )
+            wc_id = get_item_woocommerce_id(child_code)
             if wc_id:
                 continue
             # don't recurse into nested bundles
-            if frappe.db.exists("Product Bundle", {"new_item_code": child_code}):
+            if get_product_bundle_name(child_code):
                 continue
             try:
                 run_item_sync(item_code=child_code, enqueue=False)
@@ -1672,17 +1922,14 @@ class SynchroniseItem(SynchroniseWooCommerce):
     def sync_kit_options(self, item, product_id):
         """Sync kit Position/Side/Type options to WooCommerce ACF meta"""
         try:
-            bundle_name = frappe.db.get_value(
-                "Product Bundle",
-                {"new_item_code": item.item.item_code},
-                "name"
-            )
-            if not bundle_name:
+            bundle_doc = self._get_bundle_doc(item.item.item_code)
+            if not bundle_doc:
                 return
 
-            bundle_doc = frappe.get_doc("Product Bundle", bundle_name)
+            bundle_name = bundle_doc.name
             self.ensure_children_synced(bundle_doc)
             valid_rows = []
+            wc_id_by_code = get_item_woocommerce_ids([row.item_code for row in bundle_doc.items])
 
             for row in bundle_doc.items:
                 # Read option fields — support both custom_ prefixed and plain fieldnames
@@ -1691,15 +1938,10 @@ class SynchroniseItem(SynchroniseWooCommerce):
                 opt_type  = row.get("custom_type") or row.get("type") or ""
                 pack_size = row.get("custom_pack_size") or row.get("pack_size") or 0
 
-                wc_id = frappe.db.get_value(
-                    "Item WooCommerce Server",
-                    {"parent": row.item_code},
-                    "woocommerce_id"
-                )
+                wc_id = wc_id_by_code.get(row.item_code)
 
-                # TEMP DIAGNOSTIC — remove after confirming
-                frappe.log_error(
-                    "Kit Options DEBUG",
+                log_sync_debug(
+                    "Kit Options",
                     f"{bundle_name} | {row.item_code} | pos={position!r} side={side!r} "
                     f"type={opt_type!r} pack={pack_size!r} | wc_id={wc_id}"
                 )
@@ -1765,7 +2007,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
 
             # Push to kit parent product
             # frappe.log_error("Kit Options: Pushing to parent", f"product_id={product_id}, meta={meta}")
-            self.push_wc_product(product_id, meta=meta)
+            self._queue_wc_update("kit_options", meta=meta)
             # frappe.log_error("Kit Options Synced", f"Kit: {item.item.item_code}, Rows: {valid_rows}")
 
             # ── Push part_of_kit to each CHILD product ──
@@ -1809,19 +2051,18 @@ def get_list_of_wc_products(
         filters.append(["WooCommerce Product", "id", "=", item.item_woocommerce_server.woocommerce_id])
         servers = [item.item_woocommerce_server.woocommerce_server]
 
+    woocommerce_product = frappe.get_doc({"doctype": "WooCommerce Product"})
     while new_results:
-        woocommerce_product = frappe.get_doc({"doctype": "WooCommerce Product"})
         new_results = woocommerce_product.get_list(
             args={
                 "filters": filters,
-                "page_lenth": page_length,
+                "page_length": page_length,
                 "start": start,
                 "servers": servers,
                 "as_doc": True,
             }
         )
-        for wc_product in new_results:
-            wc_products.append(wc_product)
+        wc_products.extend(new_results)
         start += page_length
         if len(new_results) < page_length:
             new_results = []
@@ -1851,32 +2092,233 @@ def get_item_price_rate(item: ERPNextItemToSync):
             ),
             None,
         )
-def clear_sync_hash_and_run_item_sync(item_code: str):
+
+
+def prefetch_sync_context(item_codes: List[str]):
     """
-    Clear the last sync hash value using db.set_value, as it does not call the ORM triggers
-    and it does not update the modified timestamp (by using the update_modified parameter)
+    Bulk-load the Item Price, Bin, Product Bundle and Item WooCommerce Server rows needed to
+    sync the given items, and keep them on frappe.local.wc_sync_cache for the duration of the job
     """
+    item_codes = list(set(item_codes))
+    cache = _dict(item_codes=set(item_codes), prices={}, bins={}, bundles={}, woocommerce_ids={})
+    if item_codes:
+        for row in frappe.get_all(
+            "Item Price",
+            filters={"item_code": ["in", item_codes], "price_list": "Standard Selling"},
+            fields=["item_code", "price_list_rate"],
+        ):
+            cache.prices.setdefault(row.item_code, row.price_list_rate)
 
-    iws = frappe.qb.DocType("Item WooCommerce Server")
+        for row in frappe.get_all(
+            "Bin",
+            filters={"item_code": ["in", item_codes]},
+            fields=["item_code", "warehouse", "actual_qty"],
+        ):
+            cache.bins.setdefault(row.item_code, []).append(
+                _dict(warehouse=row.warehouse, actual_qty=row.actual_qty)
+            )
 
-    iwss = (
-        frappe.qb.from_(iws).where(iws.enabled == 1).where(iws.parent == item_code).select(iws.name)
-    ).run(as_dict=True)
+        for row in frappe.get_all(
+            "Product Bundle",
+            filters={"new_item_code": ["in", item_codes]},
+            fields=["name", "new_item_code"],
+        ):
+            cache.bundles.setdefault(row.new_item_code, row.name)
 
-    for iws in iwss:
-        frappe.db.set_value(
+        for row in frappe.get_all(
             "Item WooCommerce Server",
-            iws.name,
-            "woocommerce_last_sync_hash",
-            None,
-            update_modified=False,
+            filters={"parent": ["in", item_codes], "woocommerce_id": ["is", "set"]},
+            fields=["parent", "woocommerce_id"],
+        ):
+            cache.woocommerce_ids.setdefault(row.parent, row.woocommerce_id)
+
+    frappe.local.wc_sync_cache = cache
+    return cache
+
+
+def clear_sync_context():
+    frappe.local.wc_sync_cache = None
+
+
+def _get_sync_cache(item_code: str):
+    """
+    Return the prefetched sync context if it covers item_code
+    """
+    cache = getattr(frappe.local, "wc_sync_cache", None)
+    if cache and item_code in cache.item_codes:
+        return cache
+    return None
+
+
+def get_standard_selling_price(item_code: str) -> float:
+    cache = _get_sync_cache(item_code)
+    if cache:
+        return cache.prices.get(item_code) or 0.0
+    return (
+        frappe.db.get_value(
+            "Item Price", {"item_code": item_code, "price_list": "Standard Selling"}, "price_list_rate"
         )
+        or 0.0
+    )
+
+
+def get_item_bins(item_code: str) -> List[_dict]:
+    cache = _get_sync_cache(item_code)
+    if cache:
+        return cache.bins.get(item_code, [])
+    return frappe.get_all(
+        "Bin", filters={"item_code": item_code}, fields=["warehouse", "actual_qty"]
+    )
+
+
+@lru_cache(maxsize=None)
+def compile_jsonpath(path: str):
+    """
+    Parse a JSONPath expression once per worker; the parsed expression is reused for every item
+    """
+    return parse(path)
+
+
+@lru_cache(maxsize=256)
+def get_branch_slug(warehouse: str) -> str:
+    """
+    Convert a Warehouse name to the WooCommerce branch slug, e.g. "Riyadh Warehouse - AME" -> "riyadh-branch"
+    """
+    return (
+        warehouse.lower().replace("warehouse", "").replace(" - ame", "").strip().replace(" ", "-")
+        + "-branch"
+    )
+
+
+def get_item_total_stock(item_code: str) -> float:
+    cache = _get_sync_cache(item_code)
+    if cache:
+        return sum(b.actual_qty for b in cache.bins.get(item_code, []))
+    return frappe.db.sql(
+        "SELECT COALESCE(SUM(actual_qty), 0) FROM `tabBin` WHERE item_code = %s", item_code
+    )[0][0]
+
+
+def get_product_bundle_name(item_code: str) -> Optional[str]:
+    cache = _get_sync_cache(item_code)
+    if cache:
+        return cache.bundles.get(item_code)
+    return frappe.db.get_value("Product Bundle", {"new_item_code": item_code}, "name")
+
+
+def get_item_woocommerce_id(item_code: str):
+    cache = _get_sync_cache(item_code)
+    # Only trust positive hits, the id is set during the sync when a product is created
+    if cache and cache.woocommerce_ids.get(item_code):
+        return cache.woocommerce_ids[item_code]
+    return frappe.db.get_value("Item WooCommerce Server", {"parent": item_code}, "woocommerce_id")
+
+
+def compatibility_rows_to_meta(rows: List[dict]) -> dict:
+    """
+    Flatten compatibility rows into the add_compactable_details_<n>_<field> meta keys used on WooCommerce
+    """
+    meta_data = {}
+    for index, row in enumerate(rows):
+        for field in ("brand", "model", "years", "variant", "engine_size"):
+            meta_data[f"add_compactable_details_{index}_{field}"] = row[field]
+    return meta_data
 
-    if len(iwss) > 0:
+
+def get_item_compatibility(item_code: str) -> List[_dict]:
+    """
+    Return the rows of an Item's custom_compatibility table without loading the whole Item
+    """
+    return get_items_compatibility([item_code]).get(item_code, [])
+
+
+def get_items_compatibility(item_codes: List[str]) -> dict:
+    """
+    Return the custom_compatibility rows of several Items in one query, keyed by item code
+    """
+    compat_field = frappe.get_meta("Item").get_field("custom_compatibility")
+    if not compat_field or not item_codes:
+        return {}
+    rows_by_item = {}
+    for row in frappe.get_all(
+        compat_field.options,
+        filters={
+            "parent": ["in", list(set(item_codes))],
+            "parenttype": "Item",
+            "parentfield": "custom_compatibility",
+        },
+        fields=["parent", "brand", "model", "years", "fuel", "engine_size"],
+        order_by="parent asc, idx asc",
+    ):
+        rows_by_item.setdefault(row.parent, []).append(row)
+    return rows_by_item
+
+
+def get_random_woocommerce_ids(count: int) -> List[str]:
+    """
+    Pick random synced WooCommerce ids from a per-worker pool, refreshed every few minutes,
+    instead of sorting the whole Item WooCommerce Server table with ORDER BY RAND()
+    """
+    pool = _WC_ID_POOLS.setdefault(frappe.local.site, {"ids": [], "loaded_at": 0.0})
+    if not pool["ids"] or time.time() - pool["loaded_at"] > _WC_ID_POOL_TTL:
+        pool["ids"] = [
+            str(wc_id)
+            for wc_id in frappe.get_all(
+                "Item WooCommerce Server",
+                filters={"woocommerce_id": ["is", "set"]},
+                pluck="woocommerce_id",
+            )
+            if wc_id
+        ]
+        pool["loaded_at"] = time.time()
+    ids = pool["ids"]
+    return random.sample(ids, min(count, len(ids)))
+
+
+def get_item_woocommerce_ids(item_codes: List[str]) -> dict:
+    """
+    Resolve the WooCommerce id of several Items in one query, keyed by item code.
+    Items without a WooCommerce id are left out.
+    """
+    if not item_codes:
+        return {}
+    ids = {}
+    for row in frappe.get_all(
+        "Item WooCommerce Server",
+        filters={"parent": ["in", list(set(item_codes))], "woocommerce_id": ["is", "set"]},
+        fields=["parent", "woocommerce_id"],
+        order_by="idx asc",
+    ):
+        ids.setdefault(row.parent, row.woocommerce_id)
+    return ids
+
+
+def clear_sync_hash_and_run_item_sync(item_code: str):
+    """
+    Clear the last sync hash and pushed payload hash with a single query builder UPDATE, as it does not call the ORM triggers
+    and it does not update the modified timestamp
+    """
+
+    iws_names = frappe.get_all(
+        "Item WooCommerce Server",
+        filters={"enabled": 1, "parent": item_code, "parenttype": "Item"},
+        pluck="name",
+    )
+
+    if iws_names:
+        iws = frappe.qb.DocType("Item WooCommerce Server")
+        (
+            frappe.qb.update(iws)
+            .set(iws.woocommerce_last_sync_hash, None)
+            .set(iws.woocommerce_payload_hash, None)
+            .where(iws.name.isin(iws_names))
+        ).run()
+
+    if len(iws_names) > 0:
         run_item_sync(item_code=item_code, enqueue=True)
     
 def expand_years(text: str):
-    results = []
+    years = set()
     text = text.replace("–", "-").replace("—", "-")
 
     def normalize(year: str, base=None):
@@ -1889,9 +2331,7 @@ def expand_years(text: str):
             year = century + year
         return year
 
-    parts = re.split(r"[,\s]+", text.strip())
-
-    for part in parts:
+    for part in _YEAR_SEPARATOR_RE.split(text.strip()):
         if not part:
             continue
 
@@ -1899,13 +2339,11 @@ def expand_years(text: str):
             start, end = part.split("-")
             start = normalize(start)
             end = normalize(end, base=start)
-            for y in range(int(start), int(end) + 1):
-                results.append(str(y))
+            years.update(range(int(start), int(end) + 1))
         else:
-            results.append(normalize(part))
+            years.add(int(normalize(part)))
 
-    results = sorted(set(results), key=int)
-    return results
+    return [str(y) for y in sorted(years)]
 
 
 CHUNK_SIZE = 10
@@ -1915,7 +2353,6 @@ _current_batch_id = ""
 def bulk_run_item_sync(items):
 
     if isinstance(items, str):
-        import json
         items = json.loads(items)
 
     user = frappe.session.user
@@ -1938,12 +2375,11 @@ def bulk_run_item_sync(items):
         for i in range(0, total_items, CHUNK_SIZE)
     ]
 
-    import json as _json
     batch_id = frappe.utils.now().replace(" ", "_").replace(":", "-")
     cache_key = f"wc_bulk_sync_{user}_{batch_id}"
     frappe.db.set_default(
         cache_key,
-        _json.dumps({
+        json.dumps({
             "batch_id": batch_id,
             "chunks": chunks,
             "total_chunks": len(chunks),
@@ -1971,14 +2407,13 @@ def bulk_run_item_sync(items):
     
 def enqueue_next_chunk(user, batch_id=None):
 
-    import json as _json
     if not batch_id:
         batch_id = frappe.db.get_default(f"wc_bulk_sync_current_{user}", parent="__default")
     if not batch_id:
         return
     cache_key = f"wc_bulk_sync_{user}_{batch_id}"
     raw = frappe.db.get_default(cache_key, parent="__default")
-    progress = _json.loads(raw) if raw and raw.strip() else None
+    progress = json.loads(raw) if raw and raw.strip() else None
 
     if not progress:
         return
@@ -2027,6 +2462,55 @@ def enqueue_next_chunk(user, batch_id=None):
         timeout=18000,
         job_name=f"wc_sync_chunk_{completed}_{batch_id}",
     )
+def sync_bulk_item(item_code, batch_id=None) -> bool:
+    """
+    Sync a single item of a bulk sync and tag its Woo Sync Log with the batch
+    """
+    try:
+        if batch_id:
+            frappe.cache().set_value(f"wc_batch_{item_code}", batch_id, expires_in_sec=3600)
+        run_item_sync(item_code=item_code, enqueue=False)
+        if batch_id:
+            frappe.db.sql("""
+                UPDATE `tabWoo Sync Log`
+                SET batch_id = %s
+                WHERE item_code = %s
+                AND (batch_id IS NULL OR batch_id = '')
+                AND creation >= NOW() - INTERVAL 2 MINUTE
+                ORDER BY creation DESC
+                LIMIT 1
+            """, (batch_id, item_code))
+            frappe.db.commit()
+        return True
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "WooCommerce Sync Error")
+        return False
+
+
+def run_bulk_items_in_parallel(items, user, batch_id, workers) -> List[bool]:
+    """
+    Sync the items of a bulk sync chunk in a thread pool, each thread with its own site connection.
+
+    An item with several WooCommerce Servers is synced serially inside its thread, so a chunk opens
+    at most `workers` database connections and sends at most `workers` WooCommerce requests at a time
+    """
+    site, sites_path = frappe.local.site, frappe.local.sites_path
+
+    def sync_item(item_code):
+        frappe.init(site=site, sites_path=sites_path)
+        frappe.connect()
+        try:
+            frappe.set_user(user or "Administrator")
+            # Keeps run_item_sync_for_servers_in_parallel from starting a second pool inside this one
+            frappe.flags.in_wc_sync_worker = True
+            return sync_bulk_item(item_code, batch_id)
+        finally:
+            frappe.destroy()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(sync_item, items))
+
+
 def background_bulk_sync_chunk(items, chunk_index, user=None, batch_id=None):
 
     frappe.set_user(user or "Administrator")
@@ -2034,31 +2518,21 @@ def background_bulk_sync_chunk(items, chunk_index, user=None, batch_id=None):
     frappe.cache().set_value(f"wc_current_batch_{user}", batch_id or "", expires_in_sec=86400)
 
 
-    synced_in_chunk = 0
-    for item_code in items:
-        try:
-            if batch_id:
-                frappe.cache().set_value(f"wc_batch_{item_code}", batch_id, expires_in_sec=3600)
-            run_item_sync(item_code=item_code, enqueue=False)
-            synced_in_chunk += 1
-            if batch_id:
-                frappe.db.sql("""
-                    UPDATE `tabWoo Sync Log`
-                    SET batch_id = %s
-                    WHERE item_code = %s
-                    AND (batch_id IS NULL OR batch_id = '')
-                    AND creation >= NOW() - INTERVAL 2 MINUTE
-                    ORDER BY creation DESC
-                    LIMIT 1
-                """, (batch_id, item_code))
-                frappe.db.commit()
-        except Exception:
-            frappe.log_error(frappe.get_traceback(), "WooCommerce Sync Error")
+    # Items are synced one after the other unless "wc_sync_workers" is set in site_config.json;
+    # it bounds both the database connections and the concurrent WooCommerce requests of a chunk
+    workers = min(cint(frappe.conf.get("wc_sync_workers")) or 1, len(items))
+    if workers > 1:
+        synced_in_chunk = sum(run_bulk_items_in_parallel(items, user, batch_id, workers))
+    else:
+        synced_in_chunk = 0
+        prefetch_sync_context(items)
+        for item_code in items:
+            synced_in_chunk += sync_bulk_item(item_code, batch_id)
+        clear_sync_context()
 
     # always update progress regardless of errors
     
     try:
-        import json as _json
         if not batch_id:
             result = frappe.db.sql("""
                 SELECT defvalue FROM `tabDefaultValue`
@@ -2071,12 +2545,12 @@ def background_bulk_sync_chunk(items, chunk_index, user=None, batch_id=None):
             WHERE defkey = %s AND parent = '__default' LIMIT 1
         """, cache_key, as_dict=True)
         raw = result[0].defvalue if result else None
-        progress = _json.loads(raw) if raw and raw.strip() else None
+        progress = json.loads(raw) if raw and raw.strip() else None
 
         if progress:
             progress["completed_chunks"] += 1
             progress["synced_items"] = progress.get("synced_items", 0) + synced_in_chunk
-            frappe.db.set_default(cache_key, _json.dumps(progress), parent="__default")
+            frappe.db.set_default(cache_key, json.dumps(progress), parent="__default")
             frappe.db.commit()
 
             total_items = progress.get("total_items", "?")
@@ -2093,7 +2567,7 @@ def background_bulk_sync_chunk(items, chunk_index, user=None, batch_id=None):
                 )
                 # Mark as finished — keep the record
                 progress["status"] = "finished"
-                frappe.db.set_default(cache_key, _json.dumps(progress), parent="__default")
+                frappe.db.set_default(cache_key, json.dumps(progress), parent="__default")
                 frappe.db.commit()
             else:
                 enqueue_next_chunk(user, batch_id)
@@ -2120,15 +2594,9 @@ def verify_woo_match(log_name):
 
     item = frappe.get_doc("Item", item_code)
 
-    price_doc = frappe.get_all(
-        "Item Price",
-        filters={"item_code": item_code, "price_list": "Standard Selling"},
-        fields=["price_list_rate"], limit=1
-    )
-    erp_price = price_doc[0].price_list_rate if price_doc else 0.0
+    erp_price = get_standard_selling_price(item_code)
 
-    bins = frappe.get_all("Bin", filters={"item_code": item_code}, fields=["actual_qty"])
-    erp_stock = int(sum(b.actual_qty for b in bins))
+    erp_stock = int(get_item_total_stock(item_code))
 
     def get_wc_meta(key):
         for m in wc.get("meta_data", []):
@@ -2259,15 +2727,9 @@ def verify_item_woo_match(item_code):
 
     item = frappe.get_doc("Item", item_code)
 
-    price_doc = frappe.get_all(
-        "Item Price",
-        filters={"item_code": item_code, "price_list": "Standard Selling"},
-        fields=["price_list_rate"], limit=1
-    )
-    erp_price = price_doc[0].price_list_rate if price_doc else 0.0
+    erp_price = get_standard_selling_price(item_code)
 
-    bins = frappe.get_all("Bin", filters={"item_code": item_code}, fields=["actual_qty"])
-    erp_stock = int(sum(b.actual_qty for b in bins))
+    erp_stock = int(get_item_total_stock(item_code))
 
     def get_wc_meta(key):
         for m in wc.get("meta_data", []):
@@ -3,7 +3,20 @@ from unittest.mock import MagicMock, Mock, call, patch
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
-from woocommerce_fusion.tasks.sync_items import ERPNextItemToSync, SynchroniseItem
+from woocommerce_fusion.tasks.sync_items import (
+	ERPNextItemToSync,
+	SynchroniseItem,
+	cache_wc_category_id,
+	compatibility_rows_to_meta,
+	expand_years,
+	forget_wc_category_ids,
+	get_branch_slug,
+	get_cached_wc_category_id,
+	get_item_sync_skip_reason,
+	get_items_compatibility,
+	get_wc_products_to_skip,
+	run_item_sync,
+)
 from woocommerce_fusion.woocommerce.woocommerce_api import (
 	generate_woocommerce_record_name_from_domain_and_id,
 )
@@ -133,105 +146,6 @@ class TestWooCommerceSync(FrappeTestCase):
 		mock_create_item.assert_called_once()
 		self.assertEqual(mock_create_item.call_args.args[0], wc_product)
 
-	@patch("frappe.get_cached_doc")
-	@patch("frappe.new_doc")
-	@patch("woocommerce_fusion.tasks.sync_items.json")
-	def test_create_item(
-		self, mock_json, mock_new_doc, mock_get_cached_doc, mock_set_sync_hash, mock_run_item_sync
-	):
-		item_mock = MagicMock()
-		item_mock.append.return_value = MagicMock()
-		item_mock.woocommerce_servers = [frappe._dict(idx=1, woocommerce_server="Test Server")]
-		mock_new_doc.return_value = item_mock
-
-		# Create a mock WooCommerceProduct
-		wc_product = MagicMock()
-		wc_product.woocommerce_server = "Test Server"
-		wc_product.sku = "Test SKU"
-		wc_product.woocommerce_id = 12345
-		wc_product.woocommerce_name = "Test Product"
-
-		# Create instance of the class that contains create_item method
-		sync = SynchroniseItem(servers=Mock())
-
-		# Call the create_item method
-		sync.create_item(wc_product)
-
-		# Assertions
-		mock_new_doc.assert_called_once_with("Item")
-
-		item_mock.append.assert_called_once_with("woocommerce_servers")
-		item_mock.insert.assert_called_once()
-
-		self.assertEqual(item_mock.item_code, str(wc_product.woocommerce_id))
-		self.assertEqual(item_mock.item_name, wc_product.woocommerce_name)
-		self.assertEqual(item_mock.flags.ignore_mandatory, True)
-
-		row = item_mock.append.return_value
-		self.assertEqual(row.woocommerce_id, wc_product.woocommerce_id)
-
-	@patch("frappe.get_cached_doc")
-	@patch("frappe.new_doc")
-	@patch("woocommerce_fusion.tasks.sync_items.json")
-	def test_create_item_handles_woo_product_variant(
-		self, mock_json, mock_new_doc, mock_get_cached_doc, mock_set_sync_hash, mock_run_item_sync
-	):
-		parent_item_mock = MagicMock()
-		parent_item_mock.item_code = 9999
-		parent_item_mock.woocommerce_servers = [frappe._dict(idx=1, woocommerce_server="Test Server")]
-		item_mock = MagicMock()
-		item_mock.append.return_value = MagicMock()
-		item_mock.woocommerce_servers = [frappe._dict(idx=1, woocommerce_server="Test Server")]
-		mock_new_doc.return_value = item_mock
-		mock_run_item_sync.return_value = (parent_item_mock, None)
-
-		# Create a mock WooCommerceProduct
-		wc_product = MagicMock()
-		wc_product.woocommerce_id = 42001
-		wc_product.woocommerce_server = "Test Server"
-		wc_product.type = "variation"
-
-		# Create instance of the class that contains create_item method
-		sync = SynchroniseItem(servers=Mock())
-
-		# Call the create_item method
-		sync.create_item(wc_product)
-
-		# Assertions
-		mock_new_doc.assert_called_once_with("Item")
-
-		# Assert that ERPNext item is created as a variant of a template item
-		self.assertEqual(item_mock.variant_of, 9999)
-
-	@patch("frappe.get_cached_doc")
-	@patch("frappe.new_doc")
-	@patch("woocommerce_fusion.tasks.sync_items.json")
-	def test_create_item_handles_woo_product_with_variants(
-		self, mock_json, mock_new_doc, mock_get_cached_doc, mock_set_sync_hash, mock_run_item_sync
-	):
-		item_mock = MagicMock()
-		item_mock.append.return_value = MagicMock()
-		item_mock.woocommerce_servers = [frappe._dict(idx=1, woocommerce_server="Test Server")]
-		mock_new_doc.return_value = item_mock
-
-		# Create a mock WooCommerceProduct
-		wc_product = MagicMock()
-		wc_product.woocommerce_id = 42001
-		wc_product.woocommerce_server = "Test Server"
-		wc_product.type = "variable"
-
-		# Create instance of the class that contains create_item method
-		sync = SynchroniseItem(servers=Mock())
-
-		# Call the create_item method
-		sync.create_item(wc_product)
-
-		# Assertions
-		mock_new_doc.assert_called_once_with("Item")
-
-		# Assert that ERPNext template item is created
-		self.assertEqual(item_mock.has_variants, 1)
-
 	@patch("frappe.get_cached_doc")
 	@patch("frappe.get_doc")
 	@patch("woocommerce_fusion.tasks.sync_items.get_item_price_rate")
@@ -379,3 +293,295 @@ class TestWooCommerceSync(FrappeTestCase):
 
 		self.assertEqual(wc_product_mock.type, "variable")
 		item_mock.item.save.assert_called_once()
+
+
+class TestSyncItemHelpers(FrappeTestCase):
+	def test_get_branch_slug(self):
+		self.assertEqual(get_branch_slug("Riyadh Warehouse - AME"), "riyadh-branch")
+		self.assertEqual(get_branch_slug("North Jeddah Warehouse - AME"), "north-jeddah-branch")
+		self.assertEqual(get_branch_slug("Stores"), "stores-branch")
+
+	def test_expand_years(self):
+		self.assertEqual(expand_years("2010-12, 2015"), ["2010", "2011", "2012", "2015"])
+		self.assertEqual(expand_years("19 18–20"), ["2018", "2019", "2020"])
+		self.assertEqual(expand_years("2020,2020"), ["2020"])
+
+	def test_compatibility_rows_to_meta(self):
+		rows = [
+			{"brand": "Toyota", "model": "Camry", "years": "2018,2019", "variant": "", "engine_size": "2.5"}
+		]
+		meta = compatibility_rows_to_meta(rows)
+		self.assertEqual(meta["add_compactable_details_0_brand"], "Toyota")
+		self.assertEqual(meta["add_compactable_details_0_years"], "2018,2019")
+		self.assertEqual(meta["add_compactable_details_0_engine_size"], "2.5")
+		self.assertEqual(len(meta), 5)
+
+	def test_get_item_sync_skip_reason(self):
+		self.assertEqual(get_item_sync_skip_reason(1, 0, 100), "sync disabled")
+		self.assertEqual(get_item_sync_skip_reason(0, 1, 100), "sync disabled")
+		self.assertEqual(get_item_sync_skip_reason(0, 0, 0), "Price: 0")
+		self.assertEqual(get_item_sync_skip_reason(0, 0, None), "Price: None")
+		self.assertIsNone(get_item_sync_skip_reason(0, 0, 100))
+
+	@patch("woocommerce_fusion.tasks.sync_items.time")
+	def test_wc_category_id_cache(self, mock_time):
+		key = ("https://site1.example.com", "product_cat", "oil", 0)
+		mock_time.time.return_value = 1000.0
+		cache_wc_category_id(key, 15)
+		self.assertEqual(get_cached_wc_category_id(key), 15)
+
+		# Expired entries are looked up again
+		mock_time.time.return_value = 2000.0
+		self.assertIsNone(get_cached_wc_category_id(key))
+
+		# Ids sent in a rejected payload are dropped
+		cache_wc_category_id(key, 15)
+		forget_wc_category_ids({"categories": [{"id": 15}], "offer_category": []})
+		self.assertIsNone(get_cached_wc_category_id(key))
+
+	@patch("woocommerce_fusion.tasks.sync_items.SynchroniseItem")
+	@patch("woocommerce_fusion.tasks.sync_items.get_standard_selling_price", return_value=0)
+	def test_run_item_sync_skips_unpriced_item(self, mock_get_price, mock_sync):
+		"""
+		Test that the Item branch of run_item_sync does not sync an Item without a price
+		"""
+		item = frappe.get_doc({"doctype": "Item", "item_code": "ITEM-0001"})
+		item.append("woocommerce_servers", {"woocommerce_server": "site1.example.com"})
+
+		self.assertEqual(run_item_sync(item=item), (None, None))
+		mock_sync.assert_not_called()
+
+	@patch("woocommerce_fusion.tasks.sync_items.get_linked_item_sync_rows")
+	def test_get_wc_products_to_skip(self, mock_get_rows):
+		"""
+		Test that the WooCommerce Product branch skips products whose linked Item fails the Item rules,
+		keeps an Item with any valid price row, and never skips products without a linked Item
+		"""
+		server = "site1.example.com"
+		mock_get_rows.return_value = [
+			frappe._dict(
+				woocommerce_server=server,
+				woocommerce_id=1,
+				custom_disable_sync=1,
+				custom_disable_sync_if_not_in_stock=0,
+				price_list_rate=100,
+			),
+			frappe._dict(
+				woocommerce_server=server,
+				woocommerce_id=2,
+				custom_disable_sync=0,
+				custom_disable_sync_if_not_in_stock=0,
+				price_list_rate=None,
+			),
+			frappe._dict(
+				woocommerce_server=server,
+				woocommerce_id=3,
+				custom_disable_sync=0,
+				custom_disable_sync_if_not_in_stock=0,
+				price_list_rate=0,
+			),
+			frappe._dict(
+				woocommerce_server=server,
+				woocommerce_id=3,
+				custom_disable_sync=0,
+				custom_disable_sync_if_not_in_stock=0,
+				price_list_rate=50,
+			),
+		]
+		wc_products = [frappe._dict(woocommerce_server=server, woocommerce_id=i) for i in (1, 2, 3, 4)]
+
+		skip = get_wc_products_to_skip(wc_products)
+
+		self.assertEqual(skip, {(server, "1"), (server, "2")})
+		mock_get_rows.assert_called_once()
+		self.assertEqual(sorted(mock_get_rows.call_args.args[0]), ["1", "2", "3", "4"])
+
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.get_all")
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.get_meta")
+	def test_get_items_compatibility_reads_child_rows_in_one_query(self, mock_get_meta, mock_get_all):
+		"""
+		Test that compatibility rows of several Items come from one child table query, not Item documents
+		"""
+		mock_get_meta.return_value.get_field.return_value = frappe._dict(options="Item Compatibility")
+		mock_get_all.return_value = [
+			frappe._dict(parent="ITEM-0001", brand="Toyota", model="Camry"),
+			frappe._dict(parent="ITEM-0001", brand="Toyota", model="Corolla"),
+			frappe._dict(parent="ITEM-0002", brand="Nissan", model="Patrol"),
+		]
+
+		rows = get_items_compatibility(["ITEM-0001", "ITEM-0002", "ITEM-0001"])
+
+		mock_get_all.assert_called_once()
+		self.assertEqual(mock_get_all.call_args.args[0], "Item Compatibility")
+		self.assertEqual(
+			sorted(mock_get_all.call_args.kwargs["filters"]["parent"][1]), ["ITEM-0001", "ITEM-0002"]
+		)
+		self.assertEqual([r.model for r in rows["ITEM-0001"]], ["Camry", "Corolla"])
+		self.assertEqual([r.model for r in rows["ITEM-0002"]], ["Patrol"])
+
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.get_doc")
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.db.get_value")
+	@patch.object(SynchroniseItem, "build_compatibility_rows")
+	def test_build_item_description_reads_only_item_fields(
+		self, mock_build_rows, mock_get_value, mock_get_doc
+	):
+		"""
+		Test that the description needs a single get_value for the Item instead of the whole document
+		"""
+		mock_get_value.return_value = frappe._dict(item_name="Brake Pad", item_code="ITEM-0001")
+		mock_build_rows.return_value = [{"brand": "Toyota", "model": "Camry", "years": "2018"}]
+		sync = SynchroniseItem.__new__(SynchroniseItem)
+
+		description = sync.build_item_description("ITEM-0001")
+
+		mock_get_value.assert_called_once_with(
+			"Item", "ITEM-0001", ["item_name", "item_code"], as_dict=True
+		)
+		mock_get_doc.assert_not_called()
+		self.assertEqual(description.splitlines()[0], "Brake Pad")
+		self.assertIn("Brand - Toyota", description)
+
+
+class TestSyncItemPush(FrappeTestCase):
+	def make_sync(self, payload_hash=None):
+		server = frappe._dict(
+			name="site1.example.com",
+			woocommerce_server_url="https://site1.example.com",
+			api_consumer_key="ck",
+			api_consumer_secret="cs",
+			enable_sync=1,
+		)
+		with patch("woocommerce_fusion.tasks.sync_items.frappe.get_cached_doc"):
+			sync = SynchroniseItem(servers=[server])
+
+		item = frappe.get_doc({"doctype": "Item", "item_code": "ITEM-0001"})
+		row = item.append("woocommerce_servers", {"woocommerce_server": "site1.example.com"})
+		row.name = "ITEM-WC-0001"
+		row.woocommerce_last_sync_hash = "2024-01-01 00:00:00"
+		row.woocommerce_payload_hash = payload_hash
+		sync.item = ERPNextItemToSync(item, 1)
+		sync._sync_start = 0
+		return sync
+
+	def test_fingerprint_ignores_volatile_fields(self):
+		sync = self.make_sync()
+		sync._queue_wc_update("name", name="Brake Pad")
+		sync._queue_wc_update("bought_together_random", volatile=True, bundle_product_items=[1, 2])
+		first = sync.pending_payload_fingerprint()
+
+		sync._reset_pending_update()
+		sync._queue_wc_update("name", name="Brake Pad")
+		sync._queue_wc_update("bought_together_random", volatile=True, bundle_product_items=[3])
+		self.assertEqual(sync.pending_payload_fingerprint(), first)
+
+		sync._queue_wc_update("name", name="Brake Disc")
+		self.assertNotEqual(sync.pending_payload_fingerprint(), first)
+
+	@patch.object(SynchroniseItem, "flush_wc_product")
+	def test_push_pending_update_skips_unchanged_product(self, mock_flush):
+		sync = self.make_sync()
+		sync._queue_wc_update("name", name="Brake Pad")
+		sync.item.item_woocommerce_server.woocommerce_payload_hash = sync.pending_payload_fingerprint()
+
+		sync.push_pending_update(1)
+
+		mock_flush.assert_not_called()
+		self.assertEqual(sync._pending_fields, [])
+
+	@patch.object(SynchroniseItem, "log_sync_result")
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.db.set_value")
+	@patch.object(SynchroniseItem, "flush_wc_product", return_value={"ok": True, "status": 200})
+	def test_push_pending_update_pushes_changed_product(
+		self, mock_flush, mock_set_value, mock_log_sync_result
+	):
+		"""
+		Test that a changed product is pushed and its digest stored apart from the last sync hash
+		"""
+		sync = self.make_sync(payload_hash="outdated")
+		sync._queue_wc_update("name", name="Brake Pad")
+		digest = sync.pending_payload_fingerprint()
+
+		sync.push_pending_update(1)
+
+		mock_flush.assert_called_once_with(1)
+		mock_set_value.assert_called_once_with(
+			"Item WooCommerce Server",
+			"ITEM-WC-0001",
+			"woocommerce_payload_hash",
+			digest,
+			update_modified=False,
+		)
+		row = sync.item.item_woocommerce_server
+		self.assertEqual(row.woocommerce_payload_hash, digest)
+		self.assertEqual(row.woocommerce_last_sync_hash, "2024-01-01 00:00:00")
+		mock_log_sync_result.assert_called_once()
+
+	@patch.object(SynchroniseItem, "log_sync_result")
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.db.set_value")
+	@patch.object(SynchroniseItem, "flush_wc_product")
+	def test_deferred_push_is_completed_by_caller(
+		self, mock_flush, mock_set_value, mock_log_sync_result
+	):
+		"""
+		Test that a deferred push leaves the PUT to the caller and records its result afterwards
+		"""
+		sync = self.make_sync()
+		sync.defer_push = True
+		sync._queue_wc_update("name", name="Brake Pad")
+
+		sync.push_pending_update(1)
+
+		mock_flush.assert_not_called()
+		product_id, digest, payload, field_labels = sync.deferred_push
+		self.assertEqual((product_id, payload, field_labels), (1, {"name": "Brake Pad"}, ["name"]))
+
+		sync.complete_deferred_push({"ok": True, "status": 200})
+
+		self.assertIsNone(sync.deferred_push)
+		mock_set_value.assert_called_once()
+		self.assertEqual(sync._push_log[0]["field"], "name")
+		mock_log_sync_result.assert_called_once()
+
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.log_error")
+	@patch("woocommerce_fusion.tasks.sync_items.put_wc_product")
+	def test_flush_retries_without_rejected_images(self, mock_put, mock_log_error):
+		"""
+		Test that an update rejected with HTTP 400 is sent again without its images
+		"""
+		sync = self.make_sync()
+		mock_put.side_effect = [{"ok": False, "status": 400}, {"ok": True, "status": 200}]
+		sync._queue_wc_update("name", name="Brake Pad")
+		sync._queue_wc_update("images", images=[{"src": "https://example.com/a.jpg"}])
+
+		result = sync.flush_wc_product(1)
+
+		self.assertEqual(mock_put.call_count, 2)
+		self.assertNotIn("images", mock_put.call_args.args[2])
+		self.assertTrue(result["ok"])
+		self.assertTrue(result["images_rejected"])
+		self.assertEqual([r["field"] for r in sync._push_log], ["images", "name"])
+
+	@patch("woocommerce_fusion.tasks.sync_items.frappe.enqueue")
+	@patch("woocommerce_fusion.tasks.sync_items.get_wc_server_api_settings")
+	@patch("woocommerce_fusion.tasks.sync_items.SynchroniseItem")
+	@patch("woocommerce_fusion.tasks.sync_items.get_standard_selling_price", return_value=100)
+	def test_run_item_sync_uses_each_rows_server(
+		self, mock_get_price, mock_sync, mock_get_servers, mock_enqueue
+	):
+		"""
+		Test that each Item WooCommerce Server row is synced through its own server when enqueued
+		"""
+		site1 = frappe._dict(name="site1.example.com")
+		site2 = frappe._dict(name="site2.example.com")
+		mock_get_servers.return_value = {site1.name: site1, site2.name: site2}
+		item = frappe.get_doc({"doctype": "Item", "item_code": "ITEM-0001"})
+		item.append("woocommerce_servers", {"woocommerce_server": site1.name})
+		item.append("woocommerce_servers", {"woocommerce_server": site2.name})
+
+		run_item_sync(item=item, enqueue=True)
+
+		servers = [
+			c.kwargs["servers"] for c in mock_sync.call_args_list if "servers" in c.kwargs
+		]
+		self.assertEqual(servers, [[site1], [site2]])
+		self.assertEqual(mock_enqueue.call_count, 2)
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import hmac
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from woocommerce_fusion.woocommerce_endpoint import (
+	_process_customer_chunk,
+	sync_customers_from_woocommerce,
+	validate_request,
+)
+
+
+@patch("woocommerce_fusion.woocommerce_endpoint.frappe")
+class TestValidateRequest(FrappeTestCase):
+	secret = "webhook-secret"
+	body = b'{"id": 1}'
+
+	def setup_request(self, mock_frappe, signature):
+		headers = {
+			"x-wc-webhook-source": "https://site1.example.com/",
+			"x-wc-webhook-signature": signature,
+		}
+		mock_frappe.request.data = self.body
+		mock_frappe.get_request_header.side_effect = lambda key, default=None: headers.get(key, default)
+		mock_frappe.get_doc.return_value = frappe._dict(
+			secret=self.secret, creation_user="Administrator"
+		)
+
+	def test_valid_signature_is_accepted(self, mock_frappe):
+		digest = hmac.new(self.secret.encode("utf8"), self.body, hashlib.sha256).digest()
+		self.setup_request(mock_frappe, base64.b64encode(digest).decode())
+
+		self.assertEqual(validate_request(), (True, None, None))
+		mock_frappe.set_user.assert_called_once_with("Administrator")
+
+	def test_wrong_signature_is_rejected(self, mock_frappe):
+		digest = hmac.new(b"another-secret", self.body, hashlib.sha256).digest()
+		self.setup_request(mock_frappe, base64.b64encode(digest).decode())
+
+		valid, status, msg = validate_request()
+		self.assertFalse(valid)
+		self.assertEqual(status, HTTPStatus.UNAUTHORIZED)
+		mock_frappe.set_user.assert_not_called()
+
+	def test_malformed_signature_is_rejected(self, mock_frappe):
+		self.setup_request(mock_frappe, "not-base64!")
+
+		valid, status, msg = validate_request()
+		self.assertFalse(valid)
+		self.assertEqual(status, HTTPStatus.UNAUTHORIZED)
+
+
+@patch("woocommerce_fusion.woocommerce_endpoint._country_name", return_value="Saudi Arabia")
+@patch("woocommerce_fusion.woocommerce_endpoint.frappe")
+class TestProcessCustomerChunk(FrappeTestCase):
+	def test_failed_address_keeps_the_customer(self, mock_frappe, mock_country_name):
+		customer, address = MagicMock(), MagicMock()
+		address.insert.side_effect = Exception("City is mandatory")
+		mock_frappe.get_doc.side_effect = lambda doc: customer if doc["doctype"] == "Customer" else address
+		mock_frappe.get_all.return_value = []
+		chunk = [{"email": "a@example.com", "billing": {"address_1": "Street 1", "country": "SA"}}]
+
+		result = _process_customer_chunk(chunk)
+
+		customer.insert.assert_called_once_with(ignore_permissions=True)
+		mock_frappe.db.rollback.assert_called_once_with(save_point="wc_customer_address")
+		mock_frappe.db.commit.assert_called_once()
+		self.assertEqual(result["created"], 1)
+		self.assertEqual(result["skipped_addresses"], 1)
+
+	def test_existing_email_is_matched_case_insensitively(self, mock_frappe, mock_country_name):
+		mock_frappe.get_all.return_value = ["A@Example.com"]
+		chunk = [{"email": "a@example.com"}, {"email": "b@example.com"}, {"email": "B@example.com"}]
+
+		result = _process_customer_chunk(chunk)
+
+		self.assertEqual(result["created"], 1)
+		self.assertEqual(result["skipped"], 2)
+
+	def test_failed_chunk_is_rolled_back(self, mock_frappe, mock_country_name):
+		mock_frappe.get_all.return_value = []
+		mock_frappe.db.savepoint.side_effect = Exception("Lost connection")
+
+		with self.assertRaises(Exception):
+			_process_customer_chunk([{"email": "a@example.com"}])
+
+		mock_frappe.db.rollback.assert_called_once_with()
+		mock_frappe.db.commit.assert_not_called()
+
+
+@patch("woocommerce_fusion.woocommerce_endpoint.CUSTOMER_SYNC_CHUNK_SIZE", 2)
+@patch("woocommerce_fusion.woocommerce_endpoint._get_wcapi")
+@patch("woocommerce_fusion.woocommerce_endpoint._fetch_all_customers")
+@patch("woocommerce_fusion.woocommerce_endpoint.frappe")
+class TestSyncCustomersFromWooCommerce(FrappeTestCase):
+	def test_equal_names_are_kept_in_one_chunk(self, mock_frappe, mock_fetch, mock_get_wcapi):
+		mock_fetch.return_value = [
+			{"email": "c@example.com", "first_name": "Bob"},
+			{"email": "a@example.com", "first_name": "Ann"},
+			{"email": "b@example.com", "first_name": "Ann"},
+			{"email": "d@example.com", "first_name": "Ann"},
+			{"email": "", "first_name": "Eve"},
+		]
+
+		result = sync_customers_from_woocommerce()
+
+		chunks = [call.kwargs["chunk"] for call in mock_frappe.enqueue.call_args_list]
+		self.assertEqual([len(chunk) for chunk in chunks], [3, 1])
+		self.assertEqual({c["first_name"] for c in chunks[0]}, {"Ann"})
+		self.assertEqual(result["queued"], 4)
+		self.assertEqual(result["skipped"], 1)
@@ -11,10 +11,28 @@
 
 
 
+from unittest.mock import MagicMock
+
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from woocommerce_fusion.woocommerce.doctype.woocommerce_customer.woocommerce_customer import (
+    _fetch_all_customers,
+)
+
 class TestWoocommerceCustomer(FrappeTestCase):
     def test_customer_sync_function(self):
         result = frappe.call("woocommerce_fusion.woocommerce.doctype.woocommerce_customer.woocommerce_customer.run_customer_sync", woocommerce_customer_name="demo.mrkbatx.com:1")
         self.assertIn("message", result)
+
+    def test_fetch_all_customers_without_total_pages_header(self):
+        pages = [[{"id": i} for i in range(100)], [{"id": 100}]]
+        wcapi = MagicMock()
+        wcapi.get.side_effect = [
+            MagicMock(content=frappe.as_json(page).encode(), headers={}) for page in pages
+        ]
+
+        customers = _fetch_all_customers(wcapi)
+
+        self.assertEqual(len(customers), 101)
+        self.assertEqual(wcapi.get.call_count, 2)
@@ -33,11 +33,155 @@
 
 # apps/woocommerce_fusion/woocommerce_fusion/woocommerce/doctype/woocommerce_customer/woocommerce_customer.py
 
+from concurrent.futures import ThreadPoolExecutor
+
 import frappe
 from frappe.model.document import Document
-from woocommerce import API
 from urllib.parse import unquote
 
+from woocommerce_fusion.tasks.utils import APIWithSession, new_pooled_session
+
+# orjson parses the customer pages noticeably faster, but is not guaranteed to be installed on every bench
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# One keep-alive session per WooCommerce Server URL, shared by every API object in this worker
+_SESSIONS = {}
+
+# Redis key holding the credentials of the enabled WooCommerce Servers, see WoocommerceCustomer._init_api
+CUSTOMER_API_CREDENTIALS_KEY = "wc_customer_api_credentials"
+# Prefix of the per-URL Redis keys used by _get_wc_credentials
+SERVER_CREDENTIALS_KEY_PREFIX = "wc_customer_server_credentials:"
+
+
+def _get_session(url):
+    if url not in _SESSIONS:
+        _SESSIONS[url] = new_pooled_session()
+    return _SESSIONS[url]
+
+
+def _build_wcapi(url, consumer_key, consumer_secret, **kwargs):
+    """WooCommerce API for the given credentials, reusing the pooled session of its URL"""
+    return APIWithSession(
+        url=url,
+        consumer_key=consumer_key,
+        consumer_secret=consumer_secret,
+        version="wc/v3",
+        session=_get_session(url),
+        **kwargs,
+    )
+
+
+def _get_wcapi(server, **kwargs):
+    """WooCommerce API for a WooCommerce Server document"""
+    return _build_wcapi(
+        server.woocommerce_server_url,
+        server.api_consumer_key,
+        server.api_consumer_secret,
+        **kwargs,
+    )
+
+
+def _get_wc_credentials(wc_server_url):
+    """
+    Name, consumer key and consumer secret of the WooCommerce Server with this URL,
+    cached for ten minutes so opening or syncing customers does not query the server every time
+    """
+    key = SERVER_CREDENTIALS_KEY_PREFIX + wc_server_url
+    credentials = frappe.cache().get_value(key)
+    if credentials is None:
+        # Only the fields needed for the API, rather than loading the whole document with its child tables
+        credentials = frappe.db.get_value(
+            "WooCommerce Server",
+            {"woocommerce_server_url": wc_server_url},
+            ["name", "api_consumer_key as consumer_key", "api_consumer_secret as consumer_secret"],
+            as_dict=True,
+        )
+        if not credentials:
+            frappe.throw(f"WooCommerce Server {wc_server_url} not found", frappe.DoesNotExistError)
+        frappe.cache().set_value(key, credentials, expires_in_sec=600)
+    return credentials
+
+
+def clear_customer_api_cache():
+    frappe.cache().delete_value(CUSTOMER_API_CREDENTIALS_KEY)
+    frappe.cache().delete_keys(SERVER_CREDENTIALS_KEY_PREFIX)
+
+
+def _fetch_all_customers(wcapi):
+    """Fetch every customer of a WooCommerce server, 100 per page"""
+    customers = []
+    page = 1
+    while True:
+        response = wcapi.get("customers", params={"per_page": 100, "page": page})
+        response.raise_for_status()
+        batch = _json.loads(response.content)
+        customers.extend(batch)
+        total_pages = response.headers.get("X-WP-TotalPages")
+        if total_pages is not None:
+            if not batch or page >= int(total_pages):
+                return customers
+        # Without the header (e.g. stripped by a proxy), page until a page is empty or short
+        elif len(batch) < 100:
+            return customers
+        page += 1
+
+
+def _fetch_customer_window(wcapi, offset, limit):
+    """Fetch `limit` customers of a WooCommerce server starting at `offset`, at most 100 per request"""
+    customers = []
+    while len(customers) < limit:
+        per_page = min(limit - len(customers), 100)
+        position = offset + len(customers)
+        params = {"per_page": per_page}
+        if position % per_page == 0:
+            params["page"] = position // per_page + 1
+        else:
+            params["offset"] = position
+        response = wcapi.get("customers", params=params)
+        response.raise_for_status()
+        batch = _json.loads(response.content)
+        customers.extend(batch)
+        if len(batch) < per_page:
+            break
+    return customers
+
+
+def _count_customers(wcapi):
+    """Total customers of a WooCommerce server, read from the X-WP-Total header of a one-row page"""
+    response = wcapi.get("customers", params={"per_page": 1})
+    response.raise_for_status()
+    return int(response.headers.get("X-WP-Total") or len(response.json()))
+
+
+def _country_name(code):
+    """ERPNext Country for a WooCommerce country code, falling back to the code itself"""
+    # Cached in the site's Redis cache; unknown codes are not cached, so a Country added later is found
+    name = frappe.cache().hget("wc_country_names", code)
+    if name is None:
+        name = frappe.db.get_value("Country", {"code": code}, "name")
+        if name:
+            frappe.cache().hset("wc_country_names", code, name)
+    return name or code
+
+
+def _map_servers(fn, wc_api_list):
+    """
+    Run fn for each WooCommerce API concurrently, returning (wcapi, result, exception) in server order.
+    Exceptions are returned rather than raised so they can be logged from the request thread.
+    """
+    if not wc_api_list:
+        return []
+    with ThreadPoolExecutor(max_workers=min(8, len(wc_api_list))) as executor:
+        futures = [(wcapi, executor.submit(fn, wcapi)) for wcapi in wc_api_list]
+    results = []
+    for wcapi, future in futures:
+        exception = future.exception()
+        results.append((wcapi, None if exception else future.result(), exception))
+    return results
+
 
 class WoocommerceCustomer(Document):
     """Virtual DocType for WooCommerce Customers"""
@@ -45,30 +189,58 @@ class WoocommerceCustomer(Document):
 
     @staticmethod
     def _init_api():
-        wc_servers = frappe.get_all("WooCommerce Server", filters={"enable_sync": 1})
-        wc_servers = [frappe.get_doc("WooCommerce Server", s.name) for s in wc_servers]
-
-        wc_api_list = []
-        for server in wc_servers:
-            wc_api_list.append(API(
-                url=server.woocommerce_server_url,
-                consumer_key=server.api_consumer_key,
-                consumer_secret=server.get_password("api_consumer_secret"),
-                version="wc/v3",
-                timeout=30
-            ))
-        return wc_api_list
+        # Cache the (url, key, secret) of enabled servers rather than loading the servers on every call;
+        # API objects themselves are not picklable. Cleared when a WooCommerce Server is saved or deleted.
+        credentials = frappe.cache().get_value(CUSTOMER_API_CREDENTIALS_KEY)
+        if credentials is None:
+            wc_servers = frappe.get_all(
+                "WooCommerce Server",
+                filters={"enable_sync": 1},
+                fields=["woocommerce_server_url", "api_consumer_key", "api_consumer_secret"],
+            )
+            credentials = [
+                (server.woocommerce_server_url, server.api_consumer_key, server.api_consumer_secret)
+                for server in wc_servers
+            ]
+            frappe.cache().set_value(CUSTOMER_API_CREDENTIALS_KEY, credentials, expires_in_sec=300)
+
+        return [_build_wcapi(*credential, timeout=30) for credential in credentials]
 
     # ---------- Virtual DocType Core ----------
     @staticmethod
     def get_list(args):
-        """Fetch list of customers from WooCommerce"""
+        """Fetch one page of customers from WooCommerce"""
         wc_api_list = WoocommerceCustomer._init_api()
         records = []
 
-        for wcapi in wc_api_list:
+        start = int(args.get("limit_start") or 0)
+        page_length = int(args.get("limit_page_length") or 20)
+
+        # The list is the customers of each server one after the other, so with several servers the per-server
+        # totals decide which part of the requested window each one serves. Only that part is fetched.
+        windows = {}
+        if len(wc_api_list) == 1:
+            windows[wc_api_list[0].url] = (start, page_length)
+        else:
+            position = 0
+            for wcapi, server_count, exception in _map_servers(_count_customers, wc_api_list):
+                if exception:
+                    continue
+                offset = max(start - position, 0)
+                limit = min(start + page_length - position, server_count) - offset
+                if limit > 0:
+                    windows[wcapi.url] = (offset, limit)
+                position += server_count
+
+        wc_api_list = [wcapi for wcapi in wc_api_list if wcapi.url in windows]
+
+        def fetch_window(wcapi):
+            return _fetch_customer_window(wcapi, *windows[wcapi.url])
+
+        for wcapi, customers, exception in _map_servers(fetch_window, wc_api_list):
             try:
-                customers = wcapi.get("customers").json()
+                if exception:
+                    raise exception
                 for c in customers:
                     records.append({
                         "name": f"{wcapi.url}:{c.get('id')}",
@@ -81,27 +253,20 @@ class WoocommerceCustomer(Document):
             except Exception as e:
                 frappe.log_error(frappe.get_traceback(), "WooCommerce Customer List Fetch Failed")
 
-        # Apply pagination
-        start = int(args.get("limit_start") or 0)
-        page_length = int(args.get("limit_page_length") or 20)
-        return records[start:start + page_length]
+        return records
 
     @staticmethod
     def get_count(args):
         """Return total customer count"""
         wc_api_list = WoocommerceCustomer._init_api()
         count = 0
-        for wcapi in wc_api_list:
-            try:
-                customers = wcapi.get("customers").json()
-                count += len(customers)
-            except Exception:
-                continue
+        for wcapi, server_count, exception in _map_servers(_count_customers, wc_api_list):
+            if not exception:
+                count += server_count
         return count
 
     def load_from_db(self):
         """Load individual WooCommerce customer when opened"""
-        from urllib.parse import unquote
         decoded_name = unquote(self.name)  # Decode URL-encoded string
 
         # Fix: split only at the last colon
@@ -115,13 +280,8 @@ class WoocommerceCustomer(Document):
         self.flags = frappe._dict()
 
         # Fetch WooCommerce Server
-        wc_server = frappe.get_doc("WooCommerce Server", {"woocommerce_server_url": wc_server_url})
-        wcapi = API(
-            url=wc_server.woocommerce_server_url,
-            consumer_key=wc_server.api_consumer_key,
-            consumer_secret=wc_server.get_password("api_consumer_secret"),
-            version="wc/v3"
-        )
+        wc_server = _get_wc_credentials(wc_server_url)
+        wcapi = _build_wcapi(wc_server_url, wc_server.consumer_key, wc_server.consumer_secret)
 
         # Fetch customer data
         data = wcapi.get(f"customers/{customer_id}").json()
@@ -134,7 +294,6 @@ class WoocommerceCustomer(Document):
 
 
         billing = data.get("billing", {}) or {}
-        frappe.log_error("billing1",billing)
         # self.phone = billing.get("phone")
         # self.address = billing.get("address_1")
         # self.city = billing.get("city")
@@ -158,13 +317,8 @@ def run_customer_sync(woocommerce_customer_name):
     """Sync selected WooCommerce Customer into ERPNext Customer doctype."""
     # frappe.log_error("1")
     wc_server_url, customer_id = woocommerce_customer_name.rsplit(":", 1)
-    wc_server = frappe.get_doc("WooCommerce Server", {"woocommerce_server_url": wc_server_url})
-    wcapi = API(
-        url=wc_server.woocommerce_server_url,
-        consumer_key=wc_server.api_consumer_key,
-        consumer_secret=wc_server.get_password("api_consumer_secret"),
-        version="wc/v3"
-    )
+    wc_server = _get_wc_credentials(wc_server_url)
+    wcapi = _build_wcapi(wc_server_url, wc_server.consumer_key, wc_server.consumer_secret)
 
     data = wcapi.get(f"customers/{customer_id}").json()
     email = data.get("email")
@@ -190,9 +344,8 @@ def run_customer_sync(woocommerce_customer_name):
     
     # Create Address if available
     billing = data.get("billing", {}) or {}
-    frappe.log_error("billing",billing)
     country_code = billing.get("country")
-    country_name = frappe.db.get_value("Country", {"code": country_code}, "name") or country_code
+    country_name = _country_name(country_code)
     if billing.get("address_1"):
         address = frappe.get_doc({
             "doctype": "Address",
@@ -206,14 +359,10 @@ def run_customer_sync(woocommerce_customer_name):
             # "country": billing.get("country"),
             "country": country_name,
             "phone": billing.get("phone"),
-            "email_id": email
+            "email_id": email,
+            "links": [{"link_doctype": "Customer", "link_name": customer.name}],
         })
         address.insert(ignore_permissions=True)
-        address.append("links", {
-            "link_doctype": "Customer",
-            "link_name": customer.name
-        })
-        address.save(ignore_permissions=True)
     frappe.db.commit()
 
     return {"message": "Customer created successfully", "name": customer.name}
@@ -11,6 +11,9 @@ from frappe.utils.caching import redis_cache
 from jsonpath_ng.ext import parse
 from woocommerce import API
 
+from woocommerce_fusion.woocommerce.doctype.woocommerce_customer.woocommerce_customer import (
+	clear_customer_api_cache,
+)
 from woocommerce_fusion.woocommerce.doctype.woocommerce_order.woocommerce_order import (
 	WC_ORDER_STATUS_MAPPING,
 )
@@ -43,6 +46,12 @@ class WooCommerceServer(Document):
 		self.validate_item_map()
 		self.validate_reserved_stock_setting()
 
+	def on_update(self):
+		clear_customer_api_cache()
+
+	def on_trash(self):
+		clear_customer_api_cache()
+
 	def validate_so_status_map(self):
 		"""
 		Validate Sales Order Status Map to have unique mappings
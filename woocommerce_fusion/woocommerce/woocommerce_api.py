@@ -1,5 +1,6 @@
 import json
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
@@ -597,6 +598,7 @@ def log_and_raise_error(exception=None, error_text=None, response=None):
 		raise exception
 
 
+@lru_cache(maxsize=64)
 def parse_domain_from_url(url: str):
 	domain = urlparse(url).netloc
 	if not domain:
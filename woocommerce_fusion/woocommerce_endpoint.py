@@ -2,40 +2,72 @@ import base64
 import hashlib
 import hmac
 import json
+from functools import lru_cache
 from http import HTTPStatus
 from typing import Optional, Tuple
 
 import frappe
 from frappe import _
+from frappe.model.document import Document
 from werkzeug.wrappers import Response
 
 from woocommerce_fusion.tasks.sync_sales_orders import run_sales_order_sync
+from woocommerce_fusion.woocommerce.doctype.woocommerce_customer.woocommerce_customer import (
+	_country_name,
+	_fetch_all_customers,
+	_get_wcapi,
+	run_customer_sync,
+)
 from woocommerce_fusion.woocommerce.woocommerce_api import (
 	WC_RESOURCE_DELIMITER,
 	parse_domain_from_url,
 )
 
+# orjson parses webhook payloads faster, but is not guaranteed to be installed on every bench.
+# Its JSONDecodeError is a ValueError, like the stdlib one.
+try:
+	import orjson as _json
+except ImportError:
+	_json = json
+
+
+@lru_cache(maxsize=64)
+def _hmac_proto(secret: str) -> hmac.HMAC:
+	"""HMAC-SHA256 keyed with a webhook secret, to be copied per request"""
+	return hmac.new(secret.encode("utf8"), digestmod=hashlib.sha256)
+
 
 def validate_request() -> Tuple[bool, Optional[HTTPStatus], Optional[str]]:
+	wc_server, status, msg = authenticate_webhook()
+	return bool(wc_server), status, msg
+
+
+def authenticate_webhook() -> Tuple[Optional[Document], Optional[HTTPStatus], Optional[str]]:
+	"""
+	Validate the webhook request like validate_request, returning the WooCommerce Server it came from
+	instead of a flag
+	"""
 	# Get relevant WooCommerce Server
 	try:
 		webhook_source_url = frappe.get_request_header("x-wc-webhook-source", "")
 		wc_server = frappe.get_doc("WooCommerce Server", parse_domain_from_url(webhook_source_url))
 	except Exception:
-		return False, HTTPStatus.BAD_REQUEST, _("Missing Header")
+		return None, HTTPStatus.BAD_REQUEST, _("Missing Header")
 
-	# Validate secret
-	sig = base64.b64encode(
-		hmac.new(wc_server.secret.encode("utf8"), frappe.request.data, hashlib.sha256).digest()
-	)
-	# if (
-	# 	frappe.request.data
-	# 	and not sig == frappe.get_request_header("x-wc-webhook-signature", "").encode()
-	# ):
-	# 	return False, HTTPStatus.UNAUTHORIZED, _("Unauthorized")
+	# Validate secret, comparing raw digests in constant time
+	if frappe.request.data:
+		try:
+			provided = base64.b64decode(frappe.get_request_header("x-wc-webhook-signature", ""))
+		except ValueError:
+			provided = b""
+		signature = _hmac_proto(wc_server.secret).copy()
+		signature.update(frappe.request.data)
+		expected = signature.digest()
+		if not hmac.compare_digest(provided, expected):
+			return None, HTTPStatus.UNAUTHORIZED, _("Unauthorized")
 
 	frappe.set_user(wc_server.creation_user)
-	return True, None, None
+	return wc_server, None, None
 
 
 @frappe.whitelist(allow_guest=True, methods=["POST"])
@@ -51,7 +83,7 @@ def order_created(*args, **kwargs):
 
 	if frappe.request and frappe.request.data:
 		try:
-			order = json.loads(frappe.request.data)
+			order = _json.loads(frappe.request.data)
 		except ValueError:
 			# woocommerce returns 'webhook_id=value' for the first request which is not JSON
 			order = frappe.request.data
@@ -75,16 +107,16 @@ def order_created(*args, **kwargs):
 def customer_created(*args, **kwargs):
 	"""
 	Accepts payload data from WooCommerce "Customer Created" webhook
-	and creates a Customer in ERPNext automatically.
+	and queues the creation of the ERPNext Customer.
 	"""
     # frappe.log_error("customer creation")
-	valid, status, msg = validate_request()
-	if not valid:
+	wc_server, status, msg = authenticate_webhook()
+	if not wc_server:
 		return Response(response=msg, status=status)
 
 	if frappe.request and frappe.request.data:
 		try:
-			data = json.loads(frappe.request.data)
+			data = _json.loads(frappe.request.data)
 		except ValueError:
 			data = frappe.request.data
 		event = frappe.get_request_header("x-wc-webhook-event")
@@ -95,106 +127,177 @@ def customer_created(*args, **kwargs):
 		return Response(response=_("Event not supported"), status=HTTPStatus.BAD_REQUEST)
 
 	# --- Extract WooCommerce customer details ---
-	full_name = f"{data.get('first_name', '')} {data.get('last_name', '')}".strip()
 	email = data.get("email") or data.get("billing", {}).get("email")
-	phone = data.get("billing", {}).get("phone")
 
 	if not email:
 		return Response(response=_("Customer email missing"), status=HTTPStatus.BAD_REQUEST)
 
-	# --- Check if customer already exists ---
-	existing = frappe.db.exists("Customer", {"email_id": email})
-	if existing:
+	# run_customer_sync finds the server and customer from "<woocommerce_server_url>:<id>"
+	if not wc_server.woocommerce_server_url or not data.get("id"):
+		return Response(
+			response=_("Missing WooCommerce Server URL or customer id"), status=HTTPStatus.BAD_REQUEST
+		)
+
+	# --- Claim the email so parallel deliveries of the same webhook cannot both queue it ---
+	cache = frappe.cache()
+	if not cache.set(cache.make_key(f"wc_customer_created:{email.lower()}"), 1, nx=True, ex=60):
 		return Response(
-			response=json.dumps({"message": "Customer already exists", "name": existing}),
+			response=json.dumps({"message": "Customer creation already in progress"}),
 			status=HTTPStatus.OK,
 			content_type="application/json",
 		)
 
-	# --- Create new Customer ---
-	customer = frappe.get_doc({
-		"doctype": "Customer",
-		"customer_name": full_name or email,
-		"customer_group": "All Customer Groups",
-		"territory": "All Territories",
-		"customer_type": "Individual",
-		"email_id": email,
-		"mobile_no": phone
-	})
-	customer.insert(ignore_permissions=True)
-	frappe.db.commit()
+	# --- Create the Customer and its Address in the background ---
+	frappe.enqueue(
+		run_customer_sync,
+		queue="short",
+		woocommerce_customer_name=f"{wc_server.woocommerce_server_url}:{data['id']}",
+	)
 
 	return Response(
-		response=json.dumps({"message": "Customer created", "name": customer.name}),
+		response=json.dumps({"message": "Customer sync queued"}),
 		status=HTTPStatus.OK,
 		content_type="application/json",
 	)
- 
+
+
+CUSTOMER_SYNC_CHUNK_SIZE = 200
+
+
+def _customer_name(data):
+    return f"{data.get('first_name', '').strip()} {data.get('last_name', '').strip()}".strip() or data.get("email")
+
+
 @frappe.whitelist()
 def sync_customers_from_woocommerce():
-    """Sync all customers from WooCommerce to ERPNext manually."""
-    from woocommerce import API
-
+    """Sync all customers from WooCommerce to ERPNext manually, in background jobs of 200 customers."""
     try:
         wc_server = frappe.get_doc("WooCommerce Server", "demo.mrkbatx.com")
     except frappe.DoesNotExistError:
         frappe.throw("WooCommerce Server 'demo.mrkbatx.com' not found")
 
-    wcapi = API(
-        url=wc_server.woocommerce_server_url,
-        consumer_key=wc_server.api_consumer_key,
-        consumer_secret=wc_server.get_password("api_consumer_secret"),
-        version="wc/v3"
-    )
+    wcapi = _get_wcapi(wc_server)
 
-    customers = wcapi.get("customers").json()
+    customers = _fetch_all_customers(wcapi)
 
-    created_count = 0
+    # Skip invalid or empty emails
+    with_email = [c for c in customers if c.get("email")]
+    skipped_count = len(customers) - len(with_email)
+
+    # Customers are named after customer_name, so keep equal names in the same chunk; jobs running at
+    # the same time then never race for the same name
+    with_email.sort(key=_customer_name)
+    chunks = []
+    for data in with_email:
+        if not chunks or (
+            len(chunks[-1]) >= CUSTOMER_SYNC_CHUNK_SIZE
+            and _customer_name(chunks[-1][-1]) != _customer_name(data)
+        ):
+            chunks.append([])
+        chunks[-1].append(data)
+
+    jobs = [frappe.enqueue(_process_customer_chunk, queue="long", chunk=chunk) for chunk in chunks]
+
+    return {
+        "queued": len(with_email),
+        "skipped": skipped_count,
+        "jobs": [job.id for job in jobs if job],
+    }
+
+
+def _process_customer_chunk(chunk):
+    """Create the Customers, and their billing Addresses, of one chunk of WooCommerce customers that do not exist yet."""
     skipped_count = 0
     failed_customers = []
+    created_count = 0
+    skipped_addresses = 0
+
+    # Emails of Customers that already exist, fetched once instead of per customer. Lowercased, like
+    # the SQL lookup compares them, so case variants (also within the chunk) count as one email
+    emails = [c.get("email") for c in chunk]
+    existing_emails = {
+        e.lower()
+        for e in (
+            frappe.get_all("Customer", filters={"email_id": ["in", emails]}, pluck="email_id")
+            if emails
+            else []
+        )
+        if e
+    }
 
-    for data in customers:
-        try:
+    # One transaction for the whole chunk. Customers and Addresses are inserted one by one so their
+    # validation and hooks (such as the primary Contact) run as in run_customer_sync; a document that
+    # fails is rolled back to its savepoint.
+    try:
+        for data in chunk:
             email = data.get("email")
-            first_name = data.get("first_name", "").strip()
-            last_name = data.get("last_name", "").strip()
-            phone = data.get("billing", {}).get("phone")
 
-            # Skip invalid or empty emails
-            if not email:
+            # Skip if already exists
+            if email.lower() in existing_emails:
                 skipped_count += 1
                 continue
 
-            # Skip if already exists
-            if frappe.db.exists("Customer", {"email_id": email}):
-                skipped_count += 1
+            frappe.db.savepoint("wc_customer")
+            try:
+                customer = frappe.get_doc({
+                    "doctype": "Customer",
+                    "customer_name": _customer_name(data),
+                    "customer_group": "All Customer Groups",
+                    "territory": "All Territories",
+                    "customer_type": "Individual",
+                    "email_id": email,
+                    "mobile_no": data.get("billing", {}).get("phone")
+                })
+                customer.insert(ignore_permissions=True)
+            except Exception as e:
+                frappe.db.rollback(save_point="wc_customer")
+                failed_customers.append({
+                    "email": email,
+                    "error": str(e)
+                })
+                frappe.log_error(message=frappe.get_traceback(), title="WooCommerce Customer Sync Failed")
                 continue
 
-            # Create customer
-            customer = frappe.get_doc({
-                "doctype": "Customer",
-                "customer_name": f"{first_name} {last_name}".strip() or email,
-                "customer_group": "All Customer Groups",
-                "territory": "All Territories",
-                "customer_type": "Individual",
-                "email_id": email,
-                "mobile_no": phone
-            })
-
-            customer.insert(ignore_permissions=True)
-            frappe.db.commit()
+            existing_emails.add(email.lower())
             created_count += 1
 
-        except Exception as e:
-            failed_customers.append({
-                "email": data.get("email"),
-                "error": str(e)
-            })
-            frappe.log_error(message=frappe.get_traceback(), title="WooCommerce Customer Sync Failed")
+            # Add the billing address, linked to the customer, the same way run_customer_sync does
+            billing = data.get("billing", {}) or {}
+            if not billing.get("address_1"):
+                continue
+            frappe.db.savepoint("wc_customer_address")
+            try:
+                address = frappe.get_doc({
+                    "doctype": "Address",
+                    "address_title": customer.customer_name,
+                    "address_type": "Billing",
+                    "address_line1": billing.get("address_1"),
+                    "address_line2": billing.get("address_2"),
+                    "city": billing.get("city"),
+                    "state": billing.get("state"),
+                    "pincode": billing.get("postcode"),
+                    "country": _country_name(billing.get("country")) if billing.get("country") else None,
+                    "phone": billing.get("phone"),
+                    "email_id": email,
+                    "links": [{"link_doctype": "Customer", "link_name": customer.name}],
+                })
+                address.insert(ignore_permissions=True)
+            except Exception:
+                # The Customer is kept without an address, e.g. when the city or country is missing
+                frappe.db.rollback(save_point="wc_customer_address")
+                skipped_addresses += 1
+                frappe.log_error(message=frappe.get_traceback(), title="WooCommerce Customer Address Skipped")
+
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(message=frappe.get_traceback(), title="WooCommerce Customer Sync Failed")
+        raise
 
     result = {
         "created": created_count,
         "skipped": skipped_count,
+        "skipped_addresses": skipped_addresses,
         "failed": len(failed_customers),
         "failed_customers": failed_customers,
     }